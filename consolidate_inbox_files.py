@@ -3,62 +3,156 @@
 Script to check and consolidate human inbox files.
 """
 import os
-import filecmp
-import difflib
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+# cydifflib is a C port of difflib with identical semantics and output;
+# fall back to the stdlib implementation when it is not installed.
+try:
+    from cydifflib import unified_diff
+except ImportError:
+    from difflib import unified_diff
+
+# xxh3 hashes faster than two files can be read, so for large files it
+# is worth hashing both concurrently. Without it the streaming byte
+# compare below is faster than a stdlib hash and is used instead.
+try:
+    import xxhash
+    _HASH = xxhash.xxh3_64
+except ImportError:
+    _HASH = None
+
+@dataclass
+class FileInfo:
+    """A path together with its stat result (None if the file is missing)."""
+    path: str
+    st: Optional[os.stat_result]
+    digest: Optional[bytes] = None
+
+    @property
+    def exists(self):
+        return self.st is not None
+
+INBOX_DIR = 'eaia/main'
+
+def _probe(entries, name):
+    """Build a FileInfo for ``name`` from a single scandir of its directory."""
+    entry = entries.get(name)
+    if entry is None:
+        return FileInfo(os.path.join(INBOX_DIR, name), None)
+    return FileInfo(entry.path, entry.stat())
 
 def find_files():
     """Find both versions of the human inbox file."""
-    underscore_path = 'eaia/main/modified_human_inbox.py'
-    hyphen_path = 'eaia/main/modified-human-inbox.py'
+    # Both candidates are siblings, so one directory listing covers them.
+    try:
+        with os.scandir(INBOX_DIR) as it:
+            entries = {e.name: e for e in it if e.is_file()}
+    except FileNotFoundError:
+        entries = {}
     
-    underscore_exists = os.path.exists(underscore_path)
-    hyphen_exists = os.path.exists(hyphen_path)
+    underscore = _probe(entries, 'modified_human_inbox.py')
+    hyphen = _probe(entries, 'modified-human-inbox.py')
     
-    print(f"Underscore version exists: {underscore_exists}")
-    print(f"Hyphen version exists: {hyphen_exists}")
+    print(f"Underscore version exists: {underscore.exists}")
+    print(f"Hyphen version exists: {hyphen.exists}")
     
-    return (underscore_path if underscore_exists else None, 
-            hyphen_path if hyphen_exists else None)
-
-def compare_files(file1, file2):
-    """Compare the contents of two files and show differences."""
-    if file1 and file2 and os.path.exists(file1) and os.path.exists(file2):
-        if filecmp.cmp(file1, file2):
-            print(f"The files {file1} and {file2} are identical.")
+    return underscore, hyphen
+
+CHUNK_SIZE = 128 * 1024
+HASH_THRESHOLD = 4 * 1024 * 1024
+HASH_CHUNK_SIZE = 1 << 20
+
+def _digest(info):
+    """Hash a file once, caching the digest on its FileInfo."""
+    if info.digest is None:
+        h = _HASH()
+        with open(info.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+        info.digest = h.digest()
+    return info.digest
+
+def _same_contents(file1, file2):
+    """Stream both files in fixed-size blocks, stopping at the first mismatch.
+
+    Buffered reads are used rather than mmap: ``mmap == mmap`` compares
+    object identity, not contents, and comparing mmap slices was slower
+    than this loop because of page-fault overhead.
+    """
+    with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
+        while True:
+            a = f1.read(CHUNK_SIZE)
+            b = f2.read(CHUNK_SIZE)
+            if a != b:
+                return False
+            if not a:
+                return True
+
+def _identical(file1, file2):
+    """Decide identity from the cached stats, reading content only if needed."""
+    st1, st2 = file1.st, file2.st
+    # DirEntry.stat() leaves st_ino and st_dev at 0 on Windows, where
+    # they can't tell two files apart
+    if st1.st_ino and (st1.st_dev, st1.st_ino) == (st2.st_dev, st2.st_ino):
+        return True
+    # Files of different sizes cannot match; skip the content read entirely.
+    if st1.st_size != st2.st_size:
+        return False
+    if _HASH is not None and st1.st_size >= HASH_THRESHOLD:
+        # The C hashers release the GIL, so both reads overlap.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            digest1, digest2 = pool.map(_digest, (file1, file2))
+        return digest1 == digest2
+    return _same_contents(file1.path, file2.path)
+
+def compare_files(file1, file2, show_diff=True):
+    """Compare the contents of two files and show differences.
+
+    Each argument is a ``FileInfo`` as returned by ``find_files``, so no
+    further stat calls are needed here.
+    """
+    if file1.exists and file2.exists:
+        path1, path2 = file1.path, file2.path
+        if _identical(file1, file2):
+            print(f"The files {path1} and {path2} are identical.")
             return True
-        else:
-            print(f"The files {file1} and {file2} are different.")
-            
-            # Show differences
-            with open(file1, 'r') as f1, open(file2, 'r') as f2:
-                file1_lines = f1.readlines()
-                file2_lines = f2.readlines()
-                
-            diff = difflib.unified_diff(
-                file1_lines, file2_lines, 
-                fromfile=file1, tofile=file2, 
-                lineterm='')
-            
-            print("\nDifferences:")
-            for line in diff:
-                print(line)
+        
+        print(f"The files {path1} and {path2} are different.")
+        if not show_diff:
             return False
+        
+        # Show differences. unified_diff needs indexable sequences, so each
+        # file is read in a single call and the diff is consumed lazily.
+        with open(path1, 'r') as f1, open(path2, 'r') as f2:
+            diff = unified_diff(
+                f1.read().splitlines(keepends=True),
+                f2.read().splitlines(keepends=True),
+                fromfile=path1, tofile=path2)
+            
+            # Lines keep their own newlines, so the whole diff can be
+            # written in one call instead of one print per line.
+            sys.stdout.write("\nDifferences:\n")
+            sys.stdout.writelines(diff)
+            sys.stdout.flush()
+        return False
     else:
         print("Cannot compare files because one or both don't exist.")
         return False
 
 def suggest_consolidation(underscore_file, hyphen_file):
     """Suggest a consolidation strategy."""
-    if underscore_file and hyphen_file:
+    if underscore_file.exists and hyphen_file.exists:
         print("\nConsolidation Suggestion:")
         print("1. Keep the more complete/updated version")
         print("2. Ensure all import statements reference the correct file")
         print("3. Remove the duplicate file")
         print("\nRecommended file to keep: eaia/main/modified_human_inbox.py (underscore version)")
-    elif underscore_file:
+    elif underscore_file.exists:
         print("\nOnly the underscore version exists, no consolidation needed.")
-    elif hyphen_file:
+    elif hyphen_file.exists:
         print("\nOnly the hyphen version exists. Recommend renaming to use underscore:")
         print("mv eaia/main/modified-human-inbox.py eaia/main/modified_human_inbox.py")
     else:
@@ -69,7 +163,7 @@ def main():
     print("Checking for human inbox files...")
     underscore_file, hyphen_file = find_files()
     
-    if underscore_file and hyphen_file:
+    if underscore_file.exists and hyphen_file.exists:
         print("\nComparing file contents...")
         compare_files(underscore_file, hyphen_file)
     
@@ -60,13 +60,9 @@ def build_graph_with_memory(memory_config: Optional[MemoryConfig] = None) -> Sta
     builder.add_edge("triage", END, condition=lambda state: state.get("triage") == "no")
     
     builder.add_edge("draft_response", "find_meeting_time", 
-                  condition=lambda state: state.get("messages", []) and 
-                                          any("meeting" in str(m.get("content", "")).lower() 
-                                              for m in state.get("messages", [])))
+                  condition=lambda state: state.get("meeting_mentioned"))
     builder.add_edge("draft_response", "rewrite", 
-                  condition=lambda state: state.get("messages", []) and 
-                                         not any("meeting" in str(m.get("content", "")).lower() 
-                                                for m in state.get("messages", [])))
+                  condition=lambda state: not state.get("meeting_mentioned"))
     
     builder.add_edge("find_meeting_time", "rewrite")
     builder.add_edge("rewrite", "send_email_draft")
@@ -80,18 +76,3 @@ def build_graph_with_memory(memory_config: Optional[MemoryConfig] = None) -> Sta
     builder.set_entry_point("triage")
     
     return builder.compile()
-
-# Create the graph instance
-graph = build_graph_with_memory()
-
-def setup_memory_store() -> BaseStore:
-    """
-    Create and configure the memory store.
-    
-    Returns:
-        Configured memory store
-    """
-    # This is a placeholder - in a real implementation, this would create and
-    # return an appropriate store for memory
-    from langgraph.store import InMemoryStore
-    return InMemoryStore() 
\ No newline at end of file
@@ -7,7 +7,6 @@ It handles setup, configuration, and utilities for both semantic and procedural
 import uuid
 from typing import Optional, List, Dict, Any, Tuple
 
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langgraph.store.base import BaseStore
 from langmem import (
@@ -17,6 +16,7 @@ from langmem import (
     create_thread_extractor
 )
 
+from eaia._messages import convert_to_langchain_messages
 from eaia.schemas import EmailData
 from eaia.main.config import get_config
 
@@ -314,23 +314,6 @@ async def process_email_for_memory(email_data: EmailData, messages, config, stor
         )
 
 
-def convert_to_langchain_messages(messages):
-    """Convert messages to a format that LangMem can process."""
-    result = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            if msg.get("role") == "user":
-                result.append(HumanMessage(content=msg.get("content", "")))
-            elif msg.get("role") == "assistant":
-                result.append(AIMessage(content=msg.get("content", "")))
-            elif msg.get("type") == "tool":
-                result.append(ToolMessage(content=msg.get("content", "")))
-        else:
-            # Already a LangChain message
-            result.append(msg)
-    return result
-
-
 async def retrieve_relevant_memories(query, config, store: BaseStore, limit=5):
     """Retrieve memories relevant to the current query.
     
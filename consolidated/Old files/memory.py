@@ -1,5 +1,6 @@
 """Memory-related utilities for EAIA."""
 
+import functools
 import logging
 from typing import Any, Dict, List
 import uuid
@@ -7,19 +8,27 @@ import uuid
 from langchain_core.messages import BaseMessage
 from langsmith import Client
 from langchain_core.stores import BaseStore
+from langgraph.store.memory import InMemoryStore
+
+from eaia._messages import convert_to_langchain_messages
 
 logger = logging.getLogger(__name__)
-client = Client()
 
+@functools.cache
+def get_client() -> Client:
+    """Return the shared LangSmith client, created on first use."""
+    return Client()
+
+@functools.lru_cache(maxsize=1)
 def setup_memory_store() -> BaseStore:
     """
     Create and configure the memory store.
     
+    The store is created once and shared by every caller.
+    
     Returns:
         Configured memory store
     """
-    # This is a placeholder implementation using the correct import
-    from langgraph.store import InMemoryStore
     return InMemoryStore()
 
 async def process_email_for_memory(email: Dict[str, Any], messages: List[Any], config: Dict[str, Any], store: Any):
@@ -113,78 +122,3 @@ def _get_current_timestamp():
     """Get current timestamp for memory entry."""
     from datetime import datetime
     return datetime.now().isoformat()
-
-def convert_to_langchain_messages(messages):
-    """
-    Convert messages to LangChain format, safely handling both dictionary and object messages.
-    
-    Args:
-        messages: List of messages, which could be dictionaries or objects
-        
-    Returns:
-        List of LangChain-formatted messages
-    """
-    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
-    
-    langchain_messages = []
-    
-    for message in messages:
-        # Determine if message is a dictionary or object
-        is_dict = isinstance(message, dict)
-        
-        # Get the role safely
-        if is_dict:
-            role = message.get("role", "")
-            content = message.get("content", "")
-        else:
-            role = getattr(message, "role", "")
-            content = getattr(message, "content", "")
-        
-        # Convert based on role
-        if role == "user":
-            langchain_messages.append(HumanMessage(content=content))
-        elif role == "assistant":
-            # Check for tool calls
-            if is_dict and "tool_calls" in message:
-                tool_calls = message["tool_calls"]
-                # If tool_calls is not a list, make it a list
-                if tool_calls and not isinstance(tool_calls, list):
-                    tool_calls = [tool_calls]
-            elif not is_dict and hasattr(message, "tool_calls"):
-                tool_calls = message.tool_calls
-                # If tool_calls is not a list, make it a list
-                if tool_calls and not isinstance(tool_calls, list):
-                    tool_calls = [tool_calls]
-            else:
-                tool_calls = []
-            
-            # Process any tool calls
-            if tool_calls:
-                # Get the first tool call if it exists
-                if is_dict:
-                    langchain_messages.append(AIMessage(content=content))
-                else:
-                    langchain_messages.append(AIMessage(content=content))
-            else:
-                langchain_messages.append(AIMessage(content=content))
-                
-        elif role == "system":
-            langchain_messages.append(SystemMessage(content=content))
-        elif role == "tool" or (is_dict and message.get("type") == "tool"):
-            # Handle tool message (response from a tool)
-            if is_dict:
-                name = message.get("name", "")
-                tool_content = message.get("content", "")
-                tool_call_id = message.get("tool_call_id", "")
-            else:
-                name = getattr(message, "name", "")
-                tool_content = getattr(message, "content", "")
-                tool_call_id = getattr(message, "tool_call_id", "")
-                
-            langchain_messages.append(ToolMessage(
-                content=tool_content,
-                tool_call_id=tool_call_id,
-                name=name
-            ))
-    
-    return langchain_messages 
\ No newline at end of file
@@ -11,8 +11,12 @@ class EmailInput(TypedDict):
     email: EmailData
 
 
-# Set up the memory store at startup
-memory_store = setup_memory_store()
+def __getattr__(name):
+    # setup_memory_store is memoized, so the store is created on first
+    # access to ``memory_store`` rather than at import
+    if name == "memory_store":
+        return setup_memory_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Using the memory-enhanced graph
 app = graph
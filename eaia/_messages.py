@@ -0,0 +1,77 @@
+"""Message helpers shared across the graph and memory modules."""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+
+def _tool_message(msg):
+    return ToolMessage(
+        content=msg.get("content", ""),
+        tool_call_id=msg.get("tool_call_id", ""),
+        name=msg.get("name", ""),
+    )
+
+
+# Factories keyed by a dict message's "role", then by its "type" when the
+# role is missing or unknown
+_BY_ROLE = {
+    "user": lambda msg: HumanMessage(content=msg.get("content", "")),
+    "assistant": lambda msg: AIMessage(content=msg.get("content", "")),
+    "system": lambda msg: SystemMessage(content=msg.get("content", "")),
+    "tool": _tool_message,
+}
+_BY_TYPE = {"tool": _tool_message}
+
+
+def convert_to_langchain_messages(messages):
+    """Convert messages to a format that LangMem can process.
+
+    Non-dict messages are assumed to be LangChain messages already and are
+    passed through; dicts with an unrecognised role and type are dropped.
+    """
+    result = []
+    append = result.append
+    for msg in messages:
+        if not isinstance(msg, dict):
+            append(msg)
+            continue
+        factory = _BY_ROLE.get(msg.get("role")) or _BY_TYPE.get(msg.get("type"))
+        if factory is not None:
+            append(factory(msg))
+    return result
+
+
+def normalize_tool_name(name: str) -> str:
+    """Strip a namespace prefix models sometimes add, e.g. ``functions::Question``."""
+    return name.rsplit(":", 1)[-1].strip()
+
+
+def get_tool_calls(message):
+    """Return a message's tool calls, whether it is a dict or a message object."""
+    if isinstance(message, dict):
+        return message.get("tool_calls")
+    return getattr(message, "tool_calls", None)
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def mentions(message, word: str) -> bool:
+    """Whether ``word`` appears in a message's content or its tool-call args.
+
+    Drafts usually arrive as a tool call with empty content, so the args
+    (e.g. a ResponseEmailDraft's ``content``) have to be checked as well.
+    """
+    word = word.lower()
+    content = message.get("content") if isinstance(message, dict) else message.content
+    texts = [str(content or "")]
+    for tool_call in get_tool_calls(message) or []:
+        texts.extend(_strings(tool_call.get("args")))
+    return any(word in text.lower() for text in texts)
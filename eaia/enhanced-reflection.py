@@ -1,13 +1,20 @@
 """Enhanced reflection capabilities with LangMem integration."""
 
+import asyncio
+import functools
+import itertools
+
 from langgraph.store.base import BaseStore
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage, SystemMessage
 from typing import TypedDict, Optional, List
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.types import Command, Send
 from langmem import create_memory_manager, create_prompt_optimizer, Prompt
 
+from eaia.memory import invalidate_preference
+
 TONE_INSTRUCTIONS = "Only update the prompt to include instructions on the **style and tone and format** of the response. Do NOT update the prompt to include anything about the actual content - only the style and tone and format. The user sometimes responds differently to different types of people - take that into account, but don't be too specific."
 RESPONSE_INSTRUCTIONS = "Only update the prompt to include instructions on the **content** of the response. Do NOT update the prompt to include anything about the tone or style or format of the response."
 SCHEDULE_INSTRUCTIONS = "Only update the prompt to include instructions on how to send calendar invites - eg when to send them, what title should be, length, time of day, etc"
@@ -23,6 +30,7 @@ def get_trajectory_clean(messages):
 
 class ReflectionState(MessagesState):
     feedback: Optional[str]
+    trajectory: Optional[str]
     prompt_key: str
     assistant_key: str
     instructions: str
@@ -71,15 +79,22 @@ Based on this, return an updated prompt
 You should return the full prompt, so if there's anything from before that you want to include, make sure to do that. Feel free to override or change anything that seems irrelevant. You do not need to update the prompt - if you don't want to, just return `update_prompt = False` and an empty string for new prompt."""
 
 
+@functools.lru_cache(maxsize=1)
+def _get_reflection_model():
+    # Built once per process so the client's connection pool is reused
+    return ChatOpenAI(model="o1", disable_streaming=True)
+
+
 async def update_general(state: ReflectionState, config, store: BaseStore):
-    reflection_model = ChatOpenAI(model="o1", disable_streaming=True)
+    reflection_model = _get_reflection_model()
     # reflection_model = ChatAnthropic(model="claude-3-5-sonnet-latest")
     namespace = (state["assistant_key"],)
     key = state["prompt_key"]
     result = await store.aget(namespace, key)
 
     async def get_output(messages, current_prompt, feedback, instructions):
-        trajectory = get_trajectory_clean(messages)
+        # Reuse the trajectory rendered by determine_what_to_update if given
+        trajectory = state.get("trajectory") or get_trajectory_clean(messages)
         prompt = general_reflection_prompt.format(
             current_prompt=current_prompt,
             trajectory=trajectory,
@@ -98,19 +113,22 @@ async def update_general(state: ReflectionState, config, store: BaseStore):
         state["instructions"],
     )
     if output["update_prompt"]:
-        await store.aput(
-            namespace, key, {"data": output["new_prompt"]}, index=False
-        )
-        
-        # Store the updated prompt in memory for future reference
+        # Store the updated prompt, and a memory of the change for future
+        # reference, concurrently
         memories_namespace = (state["assistant_key"], "memories", "system_prompts")
-        await store.aput(
-            memories_namespace,
-            f"prompt_{key}_{state['instructions'][:20]}",
-            {
-                "content": f"System prompt for {key} was updated based on feedback: '{state['feedback'][:100]}...' The new prompt is: {output['new_prompt'][:100]}..."
-            }
+        await asyncio.gather(
+            store.aput(
+                namespace, key, {"data": output["new_prompt"]}, index=False
+            ),
+            store.aput(
+                memories_namespace,
+                f"prompt_{key}_{state['instructions'][:20]}",
+                {
+                    "content": f"System prompt for {key} was updated based on feedback: '{state['feedback'][:100]}...' The new prompt is: {output['new_prompt'][:100]}..."
+                }
+            ),
         )
+        invalidate_preference(namespace, key)
 
 
 general_reflection_graph = StateGraph(ReflectionState)
@@ -126,6 +144,17 @@ MEMORY_TO_UPDATE = {
     "email": "Instructions about the type of content to be included in email. Update this if you learn new information about how the user likes to respond to emails (not the tone, and not information about the user, but specifically about how or when they like to respond to emails) that may be relevant in the future.",
     "calendar": "Instructions about how to send calendar invites (including title, length, time, etc). Update this if you learn new information about how the user likes to schedule events that may be relevant in future emails.",
 }
+# The type descriptions are fixed, so the block for every subset of
+# types (16 in total) is built once here instead of on each reflection.
+_TYPES_OF_PROMPTS_CACHE = {
+    frozenset(p_types): "\n".join(
+        f"`{p_type}`: {MEMORY_TO_UPDATE[p_type]}" for p_type in p_types
+    )
+    for p_types in itertools.chain.from_iterable(
+        itertools.combinations(MEMORY_TO_UPDATE, r)
+        for r in range(len(MEMORY_TO_UPDATE) + 1)
+    )
+}
 MEMORY_TO_UPDATE_KEYS = {
     "tone": "rewrite_instructions",
     "background": "random_preferences",
@@ -140,9 +169,19 @@ MEMORY_TO_UPDATE_INSTRUCTIONS = {
 }
 
 
-CHOOSE_MEMORY_PROMPT = """You are helping an AI agent improve. You can do this by changing prompts.
+# Static part of the decision prompt; the trajectory and feedback follow it
+# in a separate human message.
+CHOOSE_MEMORY_SYSTEM_PROMPT = """You are helping an AI agent improve. You can do this by changing prompts.
 
-Here was the agent's trajectory:
+These are the different types of prompts that you can update in order to change their behavior:
+
+<types_of_prompts>
+{types_of_prompts}
+</types_of_prompts>
+
+You will be given the agent's trajectory and the user's feedback. Please choose the types of prompts that are worth updating based on this trajectory + feedback. Only do this if the feedback seems like it has info relevant to the prompt. You will update the prompts themselves in a separate step. You do not have to update any memory types if you don't want to! Just leave it empty."""
+
+CHOOSE_MEMORY_PROMPT = """Here was the agent's trajectory:
 <trajectory>
 {trajectory}
 </trajectory>
@@ -151,15 +190,7 @@ Here is the user's feedback:
 
 <feedback>
 {feedback}
-</feedback>
-
-These are the different types of prompts that you can update in order to change their behavior:
-
-<types_of_prompts>
-{types_of_prompts}
-</types_of_prompts>
-
-Please choose the types of prompts that are worth updating based on this trajectory + feedback. Only do this if the feedback seems like it has info relevant to the prompt. You will update the prompts themselves in a separate step. You do not have to update any memory types if you don't want to! Just leave it empty."""
+</feedback>"""
 
 
 class MultiMemoryInput(MessagesState):
@@ -170,50 +201,42 @@ class MultiMemoryInput(MessagesState):
 
 
 async def determine_what_to_update(state: MultiMemoryInput, config, store: BaseStore):
-    reflection_model = ChatOpenAI(model="gpt-4o", disable_streaming=True)
     reflection_model = ChatAnthropic(model="claude-3-5-sonnet-latest")
     trajectory = get_trajectory_clean(state["messages"])
-    types_of_prompts = "\n".join(
-        [f"`{p_type}`: {MEMORY_TO_UPDATE[p_type]}" for p_type in state["prompt_types"]]
-    )
+    types_of_prompts = _TYPES_OF_PROMPTS_CACHE[frozenset(state["prompt_types"])]
     
     # Retrieve relevant memories if available
     memories_context = ""
     if state.get("memories"):
         memories_context = "\n\nHere are some relevant memories that may be useful:\n" + "\n".join(state["memories"])
     
-    prompt = CHOOSE_MEMORY_PROMPT.format(
-        trajectory=trajectory,
-        feedback=state["feedback"],
-        types_of_prompts=types_of_prompts,
-    ) + memories_context
+    prompt = [
+        SystemMessage(
+            content=CHOOSE_MEMORY_SYSTEM_PROMPT.format(types_of_prompts=types_of_prompts)
+        ),
+        HumanMessage(
+            content=CHOOSE_MEMORY_PROMPT.format(
+                trajectory=trajectory,
+                feedback=state["feedback"],
+            ) + memories_context
+        ),
+    ]
 
     class MemoryToUpdate(TypedDict):
         memory_types_to_update: List[str]
 
-    response = reflection_model.with_structured_output(MemoryToUpdate).invoke(prompt)
-    sends = []
-    for t in response["memory_types_to_update"]:
-        _state = {
-            "messages": state["messages"],
-            "feedback": state["feedback"],
-            "prompt_key": MEMORY_TO_UPDATE_KEYS[t],
-            "assistant_key": state["assistant_key"],
-            "instructions": MEMORY_TO_UPDATE_INSTRUCTIONS[t],
-        }
-        send = Send("reflection", _state)
-        sends.append(send)
-    
-    # Also create new memory entries based on this reflection
+    # Also create new memory entries based on this reflection. This does
+    # not depend on the decision below, so both LLM calls run concurrently.
     memory_manager = create_memory_manager("gpt-4o")
     memories_namespace = (state["assistant_key"], "memories", "system")
     
-    # Extract and store memories
-    await memory_manager(
-        state["messages"], 
-        existing=[], 
-        namespace=memories_namespace,
-        instructions="""
+    response, _ = await asyncio.gather(
+        reflection_model.with_structured_output(MemoryToUpdate).ainvoke(prompt),
+        memory_manager(
+            state["messages"], 
+            existing=[], 
+            namespace=memories_namespace,
+            instructions="""
         Extract key information from this conversation that should be remembered for future interactions.
         Focus on extracting:
         1. User preferences for communication
@@ -222,14 +245,39 @@ async def determine_what_to_update(state: MultiMemoryInput, config, store: BaseS
         4. Background information about the user
         Only extract information that appears to be consistent patterns, not one-off instances.
         """
+        ),
     )
+    sends = []
+    for t in response["memory_types_to_update"]:
+        _state = {
+            "messages": state["messages"],
+            "feedback": state["feedback"],
+            "trajectory": trajectory,
+            "prompt_key": MEMORY_TO_UPDATE_KEYS[t],
+            "assistant_key": state["assistant_key"],
+            "instructions": MEMORY_TO_UPDATE_INSTRUCTIONS[t],
+        }
+        send = Send("reflection", _state)
+        sends.append(send)
+    
+    # Only run the prompt optimizer when there is something to update,
+    # and only over the prompt types that were chosen.
+    if response["memory_types_to_update"]:
+        sends.append(
+            Send(
+                "optimize_from_feedback",
+                {**state, "prompt_types": response["memory_types_to_update"]},
+            )
+        )
     
     return Command(goto=sends)
 
 
-# Done so this can run in parallel
+# Done so this can run in parallel. The subgraph only writes to the
+# store, so it is shielded: cancelling a sibling branch must not abandon
+# a prompt update halfway through.
 async def call_reflection(state: ReflectionState):
-    await general_reflection_graph.ainvoke(state)
+    await asyncio.shield(general_reflection_graph.ainvoke(state))
 
 
 # Initialize with prompt optimizer from LangMem
@@ -237,13 +285,15 @@ async def optimize_from_feedback(state: MemoryReflectionState, config, store: Ba
     """Uses LangMem's prompt optimizer to improve prompts based on feedback."""
     model = "gpt-4o"
     
-    # Get existing prompt data
+    # Get existing prompt data. The lookups are independent, so fetch
+    # them all concurrently.
+    namespace = (state["assistant_key"],)
+    results = await asyncio.gather(
+        *[store.aget(namespace, MEMORY_TO_UPDATE_KEYS[p_type]) for p_type in state["prompt_types"]]
+    )
     prompts = []
-    for p_type in state["prompt_types"]:
+    for p_type, result in zip(state["prompt_types"], results):
         key = MEMORY_TO_UPDATE_KEYS[p_type]
-        namespace = (state["assistant_key"],)
-        result = await store.aget(namespace, key)
-        
         if result and "data" in result.value:
             current_prompt = result.value["data"]
             prompts.append(
@@ -258,31 +308,44 @@ async def optimize_from_feedback(state: MemoryReflectionState, config, store: Ba
     # Create trajectories from messages and feedback
     trajectories = [(state["messages"], {"feedback": state["feedback"]})]
     
-    # Use LangMem's prompt optimizer
+    # Use LangMem's prompt optimizer, one call per prompt. The calls run
+    # concurrently, and each stays small instead of growing with the
+    # number of prompt types.
     optimizer = create_prompt_optimizer(model)
-    improved_prompts = await optimizer.ainvoke(
-        {"prompts": prompts, "trajectories": trajectories}
+    results = await asyncio.gather(
+        *[
+            optimizer.ainvoke({"prompts": [p], "trajectories": trajectories})
+            for p in prompts
+        ]
     )
+    improved_prompts = [p for result in results for p in result]
     
-    # Update prompts in store
+    # Update prompts in store. Every write is independent, so issue them
+    # all at once rather than two serial round-trips per prompt.
+    memories_namespace = (state["assistant_key"], "memories", "system_prompts")
+    writes = []
     for updated_prompt in improved_prompts:
-        namespace = (state["assistant_key"],)
-        await store.aput(
-            namespace,
-            updated_prompt["name"],
-            {"data": updated_prompt["prompt"]},
-            index=False
+        writes.append(
+            store.aput(
+                namespace,
+                updated_prompt["name"],
+                {"data": updated_prompt["prompt"]},
+                index=False
+            )
         )
-        
         # Also store in memory
-        memories_namespace = (state["assistant_key"], "memories", "system_prompts")
-        await store.aput(
-            memories_namespace,
-            f"prompt_{updated_prompt['name']}",
-            {
-                "content": f"System prompt for {updated_prompt['name']} was updated based on feedback: '{state['feedback'][:100]}...' The new prompt is: {updated_prompt['prompt'][:100]}..."
-            }
+        writes.append(
+            store.aput(
+                memories_namespace,
+                f"prompt_{updated_prompt['name']}",
+                {
+                    "content": f"System prompt for {updated_prompt['name']} was updated based on feedback: '{state['feedback'][:100]}...' The new prompt is: {updated_prompt['prompt'][:100]}..."
+                }
+            )
         )
+    await asyncio.gather(*writes)
+    for updated_prompt in improved_prompts:
+        invalidate_preference(namespace, updated_prompt["name"])
     
     return {"status": "Success", "updated_prompts": [p["name"] for p in improved_prompts]}
 
@@ -292,5 +355,4 @@ multi_reflection_graph.add_node(determine_what_to_update)
 multi_reflection_graph.add_node("reflection", call_reflection)
 multi_reflection_graph.add_node(optimize_from_feedback)
 multi_reflection_graph.add_edge(START, "determine_what_to_update")
-multi_reflection_graph.add_edge(START, optimize_from_feedback)
 multi_reflection_graph = multi_reflection_graph.compile()
@@ -0,0 +1,373 @@
+"""LangGraph store backed by per-namespace FAISS HNSW indexes.
+
+``InMemoryStore`` scores a vector search by comparing the query against
+every stored embedding, which grows linearly with the number of memories.
+This store keeps payloads in a dict like ``InMemoryStore`` but answers
+vector searches from an HNSW graph per namespace, so search cost grows
+roughly logarithmically instead. Given a ``path`` it also checkpoints its
+items and indexes to disk, so a restart doesn't have to re-embed them.
+"""
+
+import glob
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+    get_text_at_path,
+    tokenize_path,
+)
+from langgraph.store.base.embed import ensure_embeddings
+
+# HNSW graph degree; 32 is FAISS's usual recommendation for ~1k-dim vectors
+HNSW_M = 32
+# Once a namespace holds this many vectors its index is rebuilt with int8
+# scalar-quantized storage (4x smaller than float32), trained on them
+QUANTIZE_AFTER = 1000
+# Writes between checkpoints when the store is persisted
+CHECKPOINT_EVERY = 100
+
+
+class _NamespaceIndex:
+    """HNSW index over one namespace, mapping FAISS ids back to keys."""
+
+    def __init__(self, dims: int, quantize_after: Optional[int] = QUANTIZE_AFTER):
+        self.dims = dims
+        self.quantize_after = quantize_after
+        self.quantized = False
+        self.index = faiss.IndexIDMap2(
+            faiss.IndexHNSWFlat(dims, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        )
+        self.keys: Dict[int, str] = {}  # live FAISS id -> key
+        self.ids: Dict[str, int] = {}  # key -> live FAISS id
+        self.next_id = 0
+
+    def add(self, key: str, vector: np.ndarray):
+        # HNSW can't remove vectors, so replaced ids just stop being live
+        self.discard(key)
+        self.index.add_with_ids(vector.reshape(1, -1), np.array([self.next_id], dtype="int64"))
+        self.keys[self.next_id] = key
+        self.ids[key] = self.next_id
+        self.next_id += 1
+        if (
+            not self.quantized
+            and self.quantize_after is not None
+            and len(self.keys) >= self.quantize_after
+        ):
+            self._quantize()
+
+    def _quantize(self):
+        """Rebuild as an int8 HNSWSQ index trained on the live vectors.
+
+        Only live ids are carried over, so this also drops tombstones.
+        """
+        ids = np.fromiter(self.keys, dtype="int64", count=len(self.keys))
+        vectors = np.vstack([self.index.reconstruct(int(i)) for i in ids])
+        index = faiss.IndexHNSWSQ(
+            self.dims, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(vectors)
+        self.index = faiss.IndexIDMap2(index)
+        self.index.add_with_ids(vectors, ids)
+        self.quantized = True
+
+    def to_json(self) -> Dict[str, Any]:
+        """Everything but the FAISS index, which is written with write_index."""
+        return {
+            "dims": self.dims,
+            "quantize_after": self.quantize_after,
+            "quantized": self.quantized,
+            "keys": list(self.keys.items()),
+            "next_id": self.next_id,
+        }
+
+    @classmethod
+    def from_json(cls, state: Dict[str, Any], index) -> "_NamespaceIndex":
+        self = cls.__new__(cls)
+        self.dims = state["dims"]
+        self.quantize_after = state["quantize_after"]
+        self.quantized = state["quantized"]
+        self.index = index
+        self.keys = {int(i): key for i, key in state["keys"]}
+        self.ids = {key: i for i, key in self.keys.items()}
+        self.next_id = state["next_id"]
+        return self
+
+    def discard(self, key: str):
+        old = self.ids.pop(key, None)
+        if old is not None:
+            del self.keys[old]
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        total = self.index.ntotal
+        if not total:
+            return []
+        # Over-fetch by the number of dead ids so k live results remain
+        scores, ids = self.index.search(vector.reshape(1, -1), min(total, k + total - len(self.keys)))
+        hits = []
+        for score, i in zip(scores[0], ids[0]):
+            key = self.keys.get(int(i))
+            if key is not None:
+                hits.append((key, float(score)))
+        return hits
+
+
+def _normalize(vectors) -> np.ndarray:
+    array = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return array / norms
+
+
+def _matches(value: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    return not filter or all(value.get(k) == v for k, v in filter.items())
+
+
+class FAISSBackedStore(BaseStore):
+    """In-process store whose vector search runs on FAISS HNSW indexes.
+
+    Args:
+        index: Index config with ``dims``, ``embed`` (an ``Embeddings``
+            instance or provider string) and optionally ``fields``
+        quantize_after: Vectors per namespace before switching it to int8
+            storage, or None to keep full-precision vectors
+        path: File to checkpoint to every ``checkpoint_every`` writes and
+            to load from on first use; None keeps everything in memory
+    """
+
+    def __init__(
+        self,
+        *,
+        index: Dict[str, Any],
+        quantize_after: Optional[int] = QUANTIZE_AFTER,
+        path: Optional[str] = None,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+    ):
+        self.dims = index["dims"]
+        self.quantize_after = quantize_after
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._loaded = path is None
+        self._writes = 0  # since the last checkpoint
+        self._generation = 0
+        self.embeddings = ensure_embeddings(index["embed"])
+        self.fields = [tokenize_path(f) for f in index.get("fields") or ["$"]]
+        self._data: Dict[Tuple[str, ...], Dict[str, Item]] = {}
+        self._indexes: Dict[Tuple[str, ...], _NamespaceIndex] = {}
+        self._lock = threading.Lock()
+
+    def _text_for(self, op: PutOp) -> Optional[str]:
+        """Return the text to embed for a put, or None if it isn't indexed."""
+        if op.index is False or op.value is None:
+            return None
+        paths = self.fields if op.index is None else [tokenize_path(f) for f in op.index]
+        texts = []
+        for path in paths:
+            if path == ["$"]:
+                texts.append(json.dumps(op.value))
+            else:
+                texts.extend(t for t in get_text_at_path(op.value, path) if t)
+        return "\n".join(texts) or None
+
+    def _plan(self, ops: Iterable[Op]):
+        """Collect the documents and queries in ``ops`` that need embedding."""
+        ops = list(ops)
+        documents, queries = {}, {}
+        for i, op in enumerate(ops):
+            if isinstance(op, PutOp):
+                text = self._text_for(op)
+                if text is not None:
+                    documents[i] = text
+            elif isinstance(op, SearchOp) and op.query:
+                queries[i] = op.query
+        return ops, documents, queries
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops, documents, queries = self._plan(ops)
+        doc_vectors = self.embeddings.embed_documents(list(documents.values())) if documents else []
+        query_vectors = [self.embeddings.embed_query(q) for q in queries.values()]
+        return self._apply(ops, dict(zip(documents, doc_vectors)), dict(zip(queries, query_vectors)))
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        ops, documents, queries = self._plan(ops)
+        doc_vectors = await self.embeddings.aembed_documents(list(documents.values())) if documents else []
+        query_vectors = [await self.embeddings.aembed_query(q) for q in queries.values()]
+        return self._apply(ops, dict(zip(documents, doc_vectors)), dict(zip(queries, query_vectors)))
+
+    def _load(self):
+        """Restore the last checkpoint at ``path``, if there is one."""
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        for entry in state["indexes"]:
+            index = faiss.read_index(os.path.join(os.path.dirname(self.path), entry["file"]))
+            self._indexes[tuple(entry["namespace"])] = _NamespaceIndex.from_json(entry["state"], index)
+        for entry in state["data"]:
+            namespace = tuple(entry["namespace"])
+            self._data[namespace] = {
+                item["key"]: Item(namespace=namespace, **item) for item in entry["items"]
+            }
+        self._generation = state["generation"]
+
+    def _checkpoint(self):
+        """Write the indexes, then atomically swap in a JSON manifest pointing at them.
+        
+        Index files carry a generation number, so a crash mid-checkpoint
+        leaves the previous manifest and its files intact.
+        """
+        generation = self._generation + 1
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory or ".", exist_ok=True)
+        indexes = []
+        for i, (namespace, index) in enumerate(self._indexes.items()):
+            filename = f"{os.path.basename(self.path)}.{generation}.{i}.faiss"
+            faiss.write_index(index.index, os.path.join(directory, filename))
+            indexes.append({"namespace": namespace, "file": filename, "state": index.to_json()})
+        data = [
+            {
+                "namespace": namespace,
+                "items": [
+                    {
+                        "key": item.key,
+                        "value": item.value,
+                        "created_at": item.created_at.isoformat(),
+                        "updated_at": item.updated_at.isoformat(),
+                    }
+                    for item in items.values()
+                ],
+            }
+            for namespace, items in self._data.items()
+        ]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"data": data, "indexes": indexes, "generation": generation}, f)
+        os.replace(tmp, self.path)
+        for stale in glob.glob(glob.escape(self.path) + ".*.faiss"):
+            if not os.path.basename(stale).startswith(f"{os.path.basename(self.path)}.{generation}."):
+                os.remove(stale)
+        self._generation = generation
+        self._writes = 0
+
+    def checkpoint(self):
+        """Write the store to ``path`` now; a no-op without one."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._checkpoint()
+
+    def _apply(self, ops: List[Op], doc_vectors: Dict[int, Any], query_vectors: Dict[int, Any]) -> List[Result]:
+        results: List[Result] = []
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for i, op in enumerate(ops):
+                if isinstance(op, GetOp):
+                    results.append(self._data.get(op.namespace, {}).get(op.key))
+                elif isinstance(op, PutOp):
+                    self._put(op, doc_vectors.get(i))
+                    results.append(None)
+                elif isinstance(op, SearchOp):
+                    results.append(self._search(op, query_vectors.get(i)))
+                elif isinstance(op, ListNamespacesOp):
+                    results.append(self._list_namespaces(op))
+                else:
+                    raise ValueError(f"Unknown operation type: {type(op)}")
+            if self.path is not None and self._writes >= self.checkpoint_every:
+                self._checkpoint()
+        return results
+
+    def _put(self, op: PutOp, vector):
+        self._writes += 1
+        items = self._data.setdefault(op.namespace, {})
+        if op.value is None:
+            items.pop(op.key, None)
+            if op.namespace in self._indexes:
+                self._indexes[op.namespace].discard(op.key)
+            return
+        now = datetime.now(timezone.utc)
+        existing = items.get(op.key)
+        items[op.key] = Item(
+            value=op.value,
+            key=op.key,
+            namespace=op.namespace,
+            created_at=existing.created_at if existing else now,
+            updated_at=now,
+        )
+        if vector is not None:
+            index = self._indexes.get(op.namespace)
+            if index is None:
+                index = self._indexes[op.namespace] = _NamespaceIndex(
+                    self.dims, self.quantize_after
+                )
+            index.add(op.key, _normalize(vector))
+        elif op.namespace in self._indexes:
+            self._indexes[op.namespace].discard(op.key)
+
+    def _search(self, op: SearchOp, vector) -> List[SearchItem]:
+        prefix = op.namespace_prefix
+        namespaces = [ns for ns in self._data if ns[: len(prefix)] == prefix]
+        wanted = op.offset + op.limit
+        scored: List[Tuple[Optional[float], Item]] = []
+        if vector is not None:
+            query = _normalize(vector)
+            for ns in namespaces:
+                index = self._indexes.get(ns)
+                if index is None:
+                    continue
+                items = self._data[ns]
+                # With a filter every candidate may be rejected, so rank them all
+                k = len(index.keys) if op.filter else wanted
+                for key, score in index.search(query, k):
+                    item = items.get(key)
+                    if item is not None and _matches(item.value, op.filter):
+                        scored.append((score, item))
+            scored.sort(key=lambda pair: pair[0], reverse=True)
+        else:
+            for ns in namespaces:
+                scored.extend(
+                    (None, item) for item in self._data[ns].values()
+                    if _matches(item.value, op.filter)
+                )
+        return [
+            SearchItem(
+                namespace=item.namespace,
+                key=item.key,
+                value=item.value,
+                created_at=item.created_at,
+                updated_at=item.updated_at,
+                score=score,
+            )
+            for score, item in scored[op.offset:wanted]
+        ]
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> List[Tuple[str, ...]]:
+        def matches(ns, condition):
+            path = tuple(condition.path)
+            if len(ns) < len(path):
+                return False
+            part = ns[: len(path)] if condition.match_type == "prefix" else ns[-len(path):] if path else ()
+            return all(p == "*" or p == n for p, n in zip(path, part))
+
+        namespaces = {
+            ns[: op.max_depth] if op.max_depth is not None else ns
+            for ns, items in self._data.items()
+            if items and all(matches(ns, c) for c in op.match_conditions or ())
+        }
+        return sorted(namespaces)[op.offset: op.offset + op.limit]
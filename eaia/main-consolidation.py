@@ -1,6 +1,7 @@
 """Main entry point for the Executive AI Assistant with LangMem integration."""
 
 from typing import TypedDict
+import asyncio
 import logging
 
 # Set up logging
@@ -10,6 +11,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+from langgraph.store.memory import InMemoryStore
+
 from eaia.main.graph import graph
 from eaia.schemas import EmailData
 from eaia.memory import setup_memory_store
@@ -29,10 +32,18 @@ except Exception as e:
     logger.error(f"Error initializing memory store: {e}")
     logger.exception(e)
     # Fall back to simpler store if needed
-    from langgraph.store import InMemoryStore
     memory_store = InMemoryStore()
     logger.info("Fallback to basic InMemoryStore due to error")
 
+# The graph is almost entirely store and LLM I/O, so use uvloop's faster
+# event loop when it is installed; the default asyncio loop works otherwise.
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+except ImportError:
+    pass
+
 # Using the memory-enhanced graph
 app = graph
 
@@ -4,28 +4,35 @@ import os
 import yaml
 from typing import Dict, Any
 
+# Use the libyaml-backed loader when PyYAML was built with it
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.yaml")
+
+# Loaded once at import; get_config hands out copies
+with open(_CONFIG_PATH, "r") as f:
+    _DEFAULT_CONFIG = yaml.load(f, Loader=_Loader)
+
 
 def get_config(runtime_config: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Get configuration, combining defaults with runtime config.
-    
+
     Args:
         runtime_config: Runtime configuration to override defaults
-        
+
     Returns:
         The combined configuration
     """
-    # Load default configuration
-    config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
-    
+    # Copy the defaults so per-call overrides don't leak between callers
+    config = dict(_DEFAULT_CONFIG)
+
     # Add memory flag (defaults to True)
     config["memory"] = True
-    
+
     # Override with runtime config if provided
     if runtime_config and "configurable" in runtime_config:
         if "memory" in runtime_config["configurable"]:
             config["memory"] = runtime_config["configurable"]["memory"]
-    
+
     return config
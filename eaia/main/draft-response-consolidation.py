@@ -1,5 +1,7 @@
 """Core agent responsible for drafting email with integrated memory management."""
 
+import asyncio
+import functools
 import logging
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
@@ -15,11 +17,14 @@ from eaia.schemas import (
     Ignore,
     email_template,
 )
+from eaia._messages import mentions, normalize_tool_name
 from eaia.main.config import get_config
 from eaia.memory import (
     create_memory_tools, 
     retrieve_relevant_memories, 
-    format_memories_for_context
+    format_memories_for_context,
+    get_preference,
+    invalidate_preference,
 )
 
 logger = logging.getLogger(__name__)
@@ -62,14 +67,14 @@ ALWAYS draft emails as if they are coming from {name}. Never draft them as "{nam
 
 When adding new recipients - only do that if {name} explicitly asks for it and you know their emails. If you don't know the right emails to add in, then ask {name}. You do NOT need to add in people who are already on the email! Do NOT make up emails.
 
-{response_preferences}
+Follow {name}'s response preferences, which are provided along with the email.
 
 # Using the `SendCalendarInvite` tool
 
 Sometimes you will want to schedule a calendar event. You can do this with the `SendCalendarInvite` tool.
 If you are sure that {name} would want to schedule a meeting, and you know that {name}'s calendar is free, you can schedule a meeting by calling the `SendCalendarInvite` tool. {name} trusts you to pick good times for meetings. You shouldn't ask {name} for what meeting times are preferred, but you should make sure he wants to meet. 
 
-{schedule_preferences}
+Follow {name}'s calendar preferences, which are provided along with the email.
 
 # Using the `NewEmailDraft` tool
 
@@ -84,13 +89,21 @@ You should not ask {name} for meeting times (unless the Meeting Assistant is una
 If they ask for times from {name}, first ask the MeetingAssistant by calling the `MeetingAssistant` tool.
 Note that you should only call this if working to schedule a meeting - if a meeting has already been scheduled, and they are referencing it, no need to call this.
 
-# Background information: information you may find helpful when responding to emails or deciding what to do.
+Remember to call a tool correctly! Use the specified names exactly - not add `functions::` to the start. Pass all required arguments."""
+
+# Everything that changes per email lives here, after the static system
+# prompt above, so provider-side prefix caching can reuse the instructions.
+draft_prompt = """# Response preferences
+
+{response_preferences}
 
-{random_preferences}"""
+# Calendar preferences
 
-draft_prompt = """{instructions}
+{schedule_preferences}
 
-Remember to call a tool correctly! Use the specified names exactly - not add `functions::` to the start. Pass all required arguments.
+# Background information: information you may find helpful when responding to emails or deciding what to do.
+
+{random_preferences}
 
 {memories}
 
@@ -98,78 +111,119 @@ Here is the email thread. Note that this is the full email thread. Pay special a
 
 {email}"""
 
+# Appended to draft_prompt when draft_and_rewrite is enabled, so the draft
+# comes out in the user's tone and the separate rewrite call is skipped
+rewrite_in_draft_prompt = """
+
+# Tone
+
+Emails drafted with `ResponseEmailDraft` are sent to {name} as-is, without a separate rewrite step. \
+Write them to sound like {name} from the start: keep the information the same (do not add anything that is made up!) \
+but follow these instructions on tone:
+
+{rewrite_instructions}"""
+
+
+@functools.lru_cache(maxsize=8)
+def _get_llm(model: str, temperature: float, parallel_tool_calls: bool, tool_choice: str):
+    """Reuse one ChatOpenAI (and its HTTP connection pool) per settings combination."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        parallel_tool_calls=parallel_tool_calls,
+        tool_choice=tool_choice,
+    )
+
+
+_BASE_TOOLS = (
+    NewEmailDraft,
+    ResponseEmailDraft,
+    Question,
+    MeetingAssistant,
+    SendCalendarInvite,
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_bound_model(model: str, assistant_id: str, user_id: str, with_ignore: bool):
+    """Bind the draft tools once per model/namespace, returning the model and tool names.
+
+    bind_tools converts every tool to a JSON schema, and the memory tools
+    only depend on the assistant and user ids, so the result is reused.
+    """
+    memory_tools = create_memory_tools(
+        {"configurable": {"assistant_id": assistant_id, "user_id": user_id}}
+    )
+    tools = list(_BASE_TOOLS) + memory_tools
+    if with_ignore:
+        tools.append(Ignore)
+    llm = _get_llm(model, 0, False, "required")
+    tool_names = ", ".join(getattr(t, "name", None) or t.__name__ for t in tools)
+    return llm.bind_tools(tools), tool_names
+
+
+# Store key -> config.yaml key holding its default value
+_PREFERENCE_DEFAULTS = {
+    "schedule_preferences": "schedule_preferences",
+    "random_preferences": "background_preferences",
+    "response_preferences": "response_preferences",
+}
+_DRAFT_AND_REWRITE_DEFAULTS = {
+    **_PREFERENCE_DEFAULTS,
+    "rewrite_instructions": "rewrite_preferences",
+}
+
 
 async def draft_response(state: State, config: RunnableConfig, store: BaseStore):
     """Write an email to a customer with memory integration."""
     try:
-        model = config["configurable"].get("model", "gpt-4o")
-        llm = ChatOpenAI(
-            model=model,
-            temperature=0,
-            parallel_tool_calls=False,
-            tool_choice="required",
-        )
-        
-        # Get memory tools
-        memory_tools = create_memory_tools(config)
-        
-        tools = [
-            NewEmailDraft,
-            ResponseEmailDraft,
-            Question,
-            MeetingAssistant,
-            SendCalendarInvite,
-        ] + memory_tools
-        
         messages = state.get("messages") or []
-        if len(messages) > 0:
-            tools.append(Ignore)
-        
-        # Retrieve relevant memories for context
-        query = f"{state['email']['subject']} {state['email']['from_email']} {state['email']['page_content'][:200]}"
-        memories = await retrieve_relevant_memories(query, config, store, limit=5)
-        formatted_memories = await format_memories_for_context(memories)
+        configurable = config["configurable"]
+        model, tool_names = _get_bound_model(
+            configurable.get("model", "gpt-4o"),
+            configurable.get("assistant_id", "default"),
+            configurable.get("user_id", "default_user"),
+            len(messages) > 0,
+        )
         
         prompt_config = get_config(config)
-        namespace = (config["configurable"].get("assistant_id", "default"),)
-        
-        key = "schedule_preferences"
-        result = await store.aget(namespace, key)
-        if result and "data" in result.value:
-            schedule_preferences = result.value["data"]
-        else:
-            await store.aput(namespace, key, {"data": prompt_config["schedule_preferences"]})
-            schedule_preferences = prompt_config["schedule_preferences"]
+        namespace = (configurable.get("assistant_id", "default"),)
         
-        key = "random_preferences"
-        result = await store.aget(namespace, key)
-        if result and "data" in result.value:
-            random_preferences = result.value["data"]
-        else:
-            await store.aput(
-                namespace, key, {"data": prompt_config["background_preferences"]}
-            )
-            random_preferences = prompt_config["background_preferences"]
+        # Fetch the stored preferences and relevant memories concurrently
+        # Keep the query short and stable (subject + sender domain) so
+        # repeated emails in a thread produce the same retrieval query.
+        domain = state["email"]["from_email"].rsplit("@", 1)[-1]
+        query = f"{state['email']['subject']} {domain}"
+        draft_and_rewrite = configurable.get("draft_and_rewrite", False)
+        defaults = _DRAFT_AND_REWRITE_DEFAULTS if draft_and_rewrite else _PREFERENCE_DEFAULTS
+        *stored, memories = await asyncio.gather(
+            *(get_preference(store, namespace, key) for key in defaults),
+            retrieve_relevant_memories(query, config, store, limit=5),
+        )
+        formatted_memories = await format_memories_for_context(memories)
         
-        key = "response_preferences"
-        result = await store.aget(namespace, key)
-        if result and "data" in result.value:
-            response_preferences = result.value["data"]
-        else:
-            await store.aput(namespace, key, {"data": prompt_config["response_preferences"]})
-            response_preferences = prompt_config["response_preferences"]
+        preferences = {}
+        missing = []
+        for (key, default_key), value in zip(defaults.items(), stored):
+            if value is not None:
+                preferences[key] = value
+            else:
+                preferences[key] = prompt_config[default_key]
+                missing.append(store.aput(namespace, key, {"data": preferences[key]}))
+                invalidate_preference(namespace, key)
+        if missing:
+            await asyncio.gather(*missing)
         
-        _prompt = EMAIL_WRITING_INSTRUCTIONS.format(
-            schedule_preferences=schedule_preferences,
-            random_preferences=random_preferences,
-            response_preferences=response_preferences,
+        system_prompt = EMAIL_WRITING_INSTRUCTIONS.format(
             name=prompt_config["name"],
             full_name=prompt_config["full_name"],
             background=prompt_config["background"],
         )
         
         input_message = draft_prompt.format(
-            instructions=_prompt,
+            schedule_preferences=preferences["schedule_preferences"],
+            random_preferences=preferences["random_preferences"],
+            response_preferences=preferences["response_preferences"],
             memories=formatted_memories,
             email=email_template.format(
                 email_thread=state["email"]["page_content"],
@@ -178,20 +232,54 @@ async def draft_response(state: State, config: RunnableConfig, store: BaseStore)
                 to=state["email"].get("to_email", ""),
             ),
         )
+        if draft_and_rewrite:
+            input_message += rewrite_in_draft_prompt.format(
+                name=prompt_config["name"],
+                rewrite_instructions=preferences["rewrite_instructions"],
+            )
 
-        model = llm.bind_tools(tools)
-        messages = [{"role": "user", "content": input_message}] + messages
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": input_message},
+        ] + messages
         
         i = 0
-        while i < 5:
+        while i < 2:
             response = await model.ainvoke(messages)
+            # Models sometimes emit names like `functions::Question`; fix them
+            # here once so routing doesn't bounce them through bad_tool_name
+            for tool_call in response.tool_calls:
+                if isinstance(tool_call["name"], str):
+                    tool_call["name"] = normalize_tool_name(tool_call["name"])
+            usage = getattr(response, "usage_metadata", None) or {}
+            logger.debug(
+                "draft_response cache_read_input_tokens=%s",
+                usage.get("input_token_details", {}).get("cache_read", 0),
+            )
             if len(response.tool_calls) != 1:
                 i += 1
-                messages += [{"role": "user", "content": "Please call a valid tool call."}]
+                # Append rather than rewrite so the cached prompt prefix still
+                # matches. A reply with tool calls can't be replayed without
+                # matching tool results, so only plain replies are kept.
+                if not response.tool_calls:
+                    messages += [response]
+                messages += [
+                    {
+                        "role": "user",
+                        "content": f"Please call exactly one valid tool. Valid tools: {tool_names}.",
+                    }
+                ]
             else:
                 break
                 
-        return {"draft": response, "messages": [response]}
+        # Computed once here over the new reply so routing doesn't have to
+        # rescan the whole message history on every edge evaluation
+        meeting_mentioned = mentions(response, "meeting")
+        return {
+            "draft": response,
+            "messages": [response],
+            "meeting_mentioned": meeting_mentioned,
+        }
     except Exception as e:
         logger.error(f"Error in draft_response: {e}")
         # Create a fallback response that asks for help
@@ -1,19 +1,32 @@
 """Parts of the graph that require human input with integrated memory processing."""
 
+import asyncio
+import functools
+import itertools
 import uuid
 import logging
 
+# langsmith, langgraph.types and langchain_core are all loaded by
+# eaia.schemas (via langgraph.graph) anyway, so deferring these imports
+# wouldn't make this module any cheaper to import
 from langsmith import traceable
 from eaia.schemas import State, email_template
 from langgraph.types import interrupt
 from langgraph.store.base import BaseStore
 from typing import TypedDict, Literal, Union, Optional
-from langgraph_sdk import get_client
 from eaia.main.config import get_config
-from eaia.memory import process_email_for_memory, convert_to_langchain_messages, _safely_prepare_messages_for_conversion
+from eaia.main.triage_cache import forget_triage
+from eaia.memory import process_email_for_memory, convert_to_langchain_messages
 
 logger = logging.getLogger(__name__)
-LGC = get_client()
+
+
+@functools.cache
+def _lgc():
+    """LangGraph SDK client, created on first use rather than at import."""
+    from langgraph_sdk import get_client
+
+    return get_client()
 
 
 class HumanInterruptConfig(TypedDict):
@@ -39,7 +52,25 @@ class HumanResponse(TypedDict):
     args: Union[None, str, ActionRequest]
 
 
-TEMPLATE = """# {subject}
+# Shared interrupt configs, built once instead of on every interrupt.
+# These are passed by reference into each request and must not be mutated.
+_CFG_RESPONDABLE: HumanInterruptConfig = {
+    "allow_ignore": True,
+    "allow_respond": True,
+    "allow_edit": False,
+    "allow_accept": False,
+}
+_CFG_EDITABLE: HumanInterruptConfig = {
+    "allow_ignore": True,
+    "allow_respond": True,
+    "allow_edit": True,
+    "allow_accept": True,
+}
+
+
+def _render_email(subject, url, to, _from, page_content):
+    # f-string equivalent of the old TEMPLATE.format(...), compiled once
+    return f"""# {subject}
 
 [Click here to view the email]({url})
 
@@ -52,7 +83,7 @@ TEMPLATE = """# {subject}
 
 def _generate_email_markdown(state: State):
     contents = state["email"]
-    return TEMPLATE.format(
+    return _render_email(
         subject=contents["subject"],
         url=f"https://mail.google.com/mail/u/0/#inbox/{contents['id']}",
         to=contents["to_email"],
@@ -61,16 +92,32 @@ def _generate_email_markdown(state: State):
     )
 
 
+def _format_email_template(email):
+    # Only needed to build the reflection input, so callers format lazily
+    # inside their memory branches.
+    return email_template.format(
+        email_thread=email["page_content"],
+        author=email["from_email"],
+        subject=email["subject"],
+        to=email.get("to_email", ""),
+    )
+
+
+_TRIAGE_EXAMPLES_SUFFIX = ("triage_examples",)
+
+
 async def save_email(state: State, config, store: BaseStore, status: str):
-    namespace = (
-        config["configurable"].get("assistant_id", "default"),
-        "triage_examples",
+    # Keyed on the email id so repeated saves upsert a single example
+    # instead of paying an aget round-trip before every write.
+    assistant_id = config["configurable"].get("assistant_id", "default")
+    email = state["email"]
+    data = {"input": email, "triage": status}
+    # The user just corrected this email's triage, so its cached decision
+    # must not be replayed to look-alike emails from the same sender
+    await asyncio.gather(
+        store.aput((assistant_id,) + _TRIAGE_EXAMPLES_SUFFIX, email["id"], data),
+        forget_triage(store, assistant_id, email),
     )
-    key = state["email"]["id"]
-    response = await store.aget(namespace, key)
-    if response is None:
-        data = {"input": state["email"], "triage": status}
-        await store.aput(namespace, str(uuid.uuid4()), data)
 
 
 @traceable
@@ -78,9 +125,12 @@ async def send_message(state: State, config, store):
     prompt_config = get_config(config)
     memory = prompt_config["memory"]
     user = prompt_config['name']
+    email = state["email"]
+    messages = state["messages"]
+    cfg_conf = config["configurable"]
     
     # Check if messages[-1] is a dict or an object and access tool_calls accordingly
-    last_message = state["messages"][-1]
+    last_message = messages[-1]
     
     # Handle both dictionary and object cases
     if isinstance(last_message, dict):
@@ -100,25 +150,13 @@ async def send_message(state: State, config, store):
     
     request: HumanInterrupt = {
         "action_request": {"action": tool_call_name, "args": tool_call_args},
-        "config": {
-            "allow_ignore": True,
-            "allow_respond": True,
-            "allow_edit": False,
-            "allow_accept": False,
-        },
+        "config": _CFG_RESPONDABLE,
         "description": _generate_email_markdown(state),
     }
     
     try:
         response = interrupt([request])[0]
         
-        _email_template = email_template.format(
-            email_thread=state["email"]["page_content"],
-            author=state["email"]["from_email"],
-            subject=state["email"]["subject"],
-            to=state["email"].get("to_email", ""),
-        )
-        
         if response["type"] == "response":
             msg = {
                 "type": "tool",
@@ -127,16 +165,7 @@ async def send_message(state: State, config, store):
                 "tool_call_id": tool_call_id,
             }
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -144,12 +173,23 @@ async def send_message(state: State, config, store):
                             "content": f"Draft a response to this email:\n\n{_email_template}",
                         }
                     ]
-                    + state["messages"],
+                    + messages,
                     "feedback": f"{user} responded in this way: {response['args']}",
                     "prompt_types": ["background"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                # Saving the example, extracting memories and kicking off reflection
+                # are independent round-trips, so run them concurrently.
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         elif response["type"] == "ignore":
             msg = {
                 "role": "assistant",
@@ -185,9 +225,12 @@ async def send_email_draft(state: State, config, store):
     prompt_config = get_config(config)
     memory = prompt_config["memory"]
     user = prompt_config['name']
+    email = state["email"]
+    messages = state["messages"]
+    cfg_conf = config["configurable"]
     
     # Check if messages[-1] is a dict or an object and access tool_calls accordingly
-    last_message = state["messages"][-1]
+    last_message = messages[-1]
     
     # Handle both dictionary and object cases
     if isinstance(last_message, dict):
@@ -209,25 +252,13 @@ async def send_email_draft(state: State, config, store):
     
     request: HumanInterrupt = {
         "action_request": {"action": tool_call_name, "args": tool_call_args},
-        "config": {
-            "allow_ignore": True,
-            "allow_respond": True,
-            "allow_edit": True,
-            "allow_accept": True,
-        },
+        "config": _CFG_EDITABLE,
         "description": _generate_email_markdown(state),
     }
     
     try:
         response = interrupt([request])[0]
         
-        _email_template = email_template.format(
-            email_thread=state["email"]["page_content"],
-            author=state["email"]["from_email"],
-            subject=state["email"]["subject"],
-            to=state["email"].get("to_email", ""),
-        )
-        
         if response["type"] == "response":
             msg = {
                 "type": "tool",
@@ -236,16 +267,7 @@ async def send_email_draft(state: State, config, store):
                 "tool_call_id": tool_call_id,
             }
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -253,12 +275,21 @@ async def send_email_draft(state: State, config, store):
                             "content": f"Draft a response to this email:\n\n{_email_template}",
                         }
                     ]
-                    + state["messages"],
+                    + messages,
                     "feedback": f"Error, {user} interrupted and gave this feedback: {response['args']}",
                     "prompt_types": ["tone", "email", "background", "calendar"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         
         elif response["type"] == "ignore":
             msg = {
@@ -294,17 +325,6 @@ async def send_email_draft(state: State, config, store):
             }
             
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
-                
                 # Extract content from the tool_call safely
                 content_value = ""
                 if isinstance(tool_call, dict) and "args" in tool_call:
@@ -312,6 +332,7 @@ async def send_email_draft(state: State, config, store):
                     if isinstance(args, dict) and "content" in args:
                         content_value = args["content"]
                 
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -325,21 +346,29 @@ async def send_email_draft(state: State, config, store):
                     ],
                     "feedback": f"A better response would have been: {corrected}",
                     "prompt_types": ["tone", "email", "background", "calendar"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         
         elif response["type"] == "accept":
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(messages),
+                        config,
+                        store
+                    ),
                 )
             return None
         
@@ -363,46 +392,28 @@ async def notify(state: State, config, store):
     prompt_config = get_config(config)
     memory = prompt_config["memory"]
     user = prompt_config['name']
+    email = state["email"]
+    messages = state["messages"]
+    cfg_conf = config["configurable"]
     
     # Check if there are messages and extract the last one safely
     last_message = None
-    if state["messages"] and len(state["messages"]) > 0:
-        last_message = state["messages"][-1]
+    if messages and len(messages) > 0:
+        last_message = messages[-1]
     
     request: HumanInterrupt = {
         "action_request": {"action": "Notify", "args": {}},
-        "config": {
-            "allow_ignore": True,
-            "allow_respond": True,
-            "allow_edit": False,
-            "allow_accept": False,
-        },
+        "config": _CFG_RESPONDABLE,
         "description": _generate_email_markdown(state),
     }
     
     try:
         response = interrupt([request])[0]
         
-        _email_template = email_template.format(
-            email_thread=state["email"]["page_content"],
-            author=state["email"]["from_email"],
-            subject=state["email"]["subject"],
-            to=state["email"].get("to_email", ""),
-        )
-        
         if response["type"] == "response":
             msg = {"type": "user", "content": response["args"]}
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -410,12 +421,21 @@ async def notify(state: State, config, store):
                             "content": f"Draft a response to this email:\n\n{_email_template}",
                         }
                     ]
-                    + state["messages"],
+                    + messages,
                     "feedback": f"{user} gave these instructions: {response['args']}",
                     "prompt_types": ["email", "background", "calendar"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         elif response["type"] == "ignore":
             # Generate a new ID instead of trying to access it from last_message
             msg = {
@@ -458,9 +478,12 @@ async def send_cal_invite(state: State, config, store):
     prompt_config = get_config(config)
     memory = prompt_config["memory"]
     user = prompt_config['name']
+    email = state["email"]
+    messages = state["messages"]
+    cfg_conf = config["configurable"]
     
     # Check if messages[-1] is a dict or an object and access tool_calls accordingly
-    last_message = state["messages"][-1]
+    last_message = messages[-1]
     
     # Handle both dictionary and object cases
     if isinstance(last_message, dict):
@@ -482,25 +505,13 @@ async def send_cal_invite(state: State, config, store):
     
     request: HumanInterrupt = {
         "action_request": {"action": tool_call_name, "args": tool_call_args},
-        "config": {
-            "allow_ignore": True,
-            "allow_respond": True,
-            "allow_edit": True,
-            "allow_accept": True,
-        },
+        "config": _CFG_EDITABLE,
         "description": _generate_email_markdown(state),
     }
     
     try:
         response = interrupt([request])[0]
         
-        _email_template = email_template.format(
-            email_thread=state["email"]["page_content"],
-            author=state["email"]["from_email"],
-            subject=state["email"]["subject"],
-            to=state["email"].get("to_email", ""),
-        )
-        
         if response["type"] == "response":
             msg = {
                 "type": "tool",
@@ -509,16 +520,7 @@ async def send_cal_invite(state: State, config, store):
                 "tool_call_id": tool_call_id,
             }
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -526,12 +528,21 @@ async def send_cal_invite(state: State, config, store):
                             "content": f"Draft a response to this email:\n\n{_email_template}",
                         }
                     ]
-                    + state["messages"],
+                    + messages,
                     "feedback": f"{user} interrupted gave these instructions: {response['args']}",
                     "prompt_types": ["email", "background", "calendar"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         elif response["type"] == "ignore":
             msg = {
                 "role": "assistant",
@@ -561,16 +572,7 @@ async def send_cal_invite(state: State, config, store):
                 ],
             }
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"] + [msg])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
-                )
+                _email_template = _format_email_template(email)
                 rewrite_state = {
                     "messages": [
                         {
@@ -578,23 +580,31 @@ async def send_cal_invite(state: State, config, store):
                             "content": f"Draft a response to this email:\n\n{_email_template}",
                         }
                     ]
-                    + state["messages"],
+                    + messages,
                     "feedback": f"{user} interrupted gave these instructions: {response['args']}",
                     "prompt_types": ["email", "background", "calendar"],
-                    "assistant_key": config["configurable"].get("assistant_id", "default"),
+                    "assistant_key": cfg_conf.get("assistant_id", "default"),
                 }
-                await LGC.runs.create(None, "multi_reflection_graph", input=rewrite_state)
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(itertools.chain(messages, (msg,))),
+                        config,
+                        store
+                    ),
+                    _lgc().runs.create(None, "multi_reflection_graph", input=rewrite_state),
+                )
         elif response["type"] == "accept":
             if memory:
-                await save_email(state, config, store, "email")
-                # Safely prepare messages for conversion
-                safe_messages = _safely_prepare_messages_for_conversion(state["messages"])
-                # Process email for memory extraction
-                await process_email_for_memory(
-                    state["email"],
-                    convert_to_langchain_messages(safe_messages),
-                    config,
-                    store
+                await asyncio.gather(
+                    save_email(state, config, store, "email"),
+                    process_email_for_memory(
+                        email,
+                        convert_to_langchain_messages(messages),
+                        config,
+                        store
+                    ),
                 )
             return None
         else:
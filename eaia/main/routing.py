@@ -0,0 +1,100 @@
+"""Conditional-edge routers for the main graph."""
+
+import logging
+from typing import Literal
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+from eaia._messages import get_tool_calls
+from eaia.schemas import State
+
+logger = logging.getLogger(__name__)
+
+
+# Routing tables for the conditional edges: triage response / tool name ->
+# next node. One dict lookup per step instead of an if/elif chain.
+_TRIAGE_ROUTES = {
+    "email": "draft_response",
+    "no": "mark_as_read_node",
+    "notify": "notify",
+    "question": "draft_response",
+}
+_ACTION_ROUTES = {
+    "Question": "send_message",
+    "ResponseEmailDraft": "rewrite",
+    "Ignore": "mark_as_read_node",
+    "MeetingAssistant": "find_meeting_time",
+    "SendCalendarInvite": "send_cal_invite",
+    # Handle memory tool calls
+    "ManageMemory": "process_memory_node",
+    "SearchMemory": "process_memory_node",
+}
+_HUMAN_ROUTES = {
+    "ResponseEmailDraft": "send_email_node",
+    "SendCalendarInvite": "send_cal_invite_node",
+    "Ignore": "mark_as_read_node",
+    "Question": "draft_response",
+}
+
+
+def route_after_triage(
+    state: State,
+) -> Literal["draft_response", "mark_as_read_node", "notify"]:
+    """Route to the appropriate node based on triage result."""
+    response = getattr(state.get("triage"), "response", None)
+    route = _TRIAGE_ROUTES.get(response)
+    if route is None:
+        logger.debug(f"Unknown triage response: {response}")
+        return "notify"  # Default to notify if unknown
+    return route
+
+
+def take_action(
+    state: State,
+    config,
+) -> Literal[
+    "send_message",
+    "rewrite",
+    "send_email_draft",
+    "mark_as_read_node",
+    "find_meeting_time",
+    "send_cal_invite",
+    "process_memory_node",
+    "bad_tool_name",
+]:
+    """Determine which action to take based on the tool call."""
+    messages = state.get("messages") or []
+    tool_calls = get_tool_calls(messages[-1]) if messages else None
+    if not tool_calls or len(tool_calls) != 1:
+        logger.debug("Expected exactly one tool call")
+        return "bad_tool_name"
+    tool_name = tool_calls[0]["name"]
+    # With draft_and_rewrite the draft is already in the user's tone, so
+    # the separate rewrite call (and its second prefill) is skipped
+    if tool_name == "ResponseEmailDraft" and config["configurable"].get("draft_and_rewrite"):
+        return "send_email_draft"
+    return _ACTION_ROUTES.get(tool_name, "bad_tool_name")
+
+
+def enter_after_human(
+    state,
+) -> Literal[
+    "mark_as_read_node", "draft_response", "send_email_node", "send_cal_invite_node"
+]:
+    """Determine where to go after human interaction."""
+    messages = state.get("messages") or []
+    if len(messages) == 0:
+        if getattr(state.get("triage"), "response", None) == "notify":
+            return "mark_as_read_node"
+        logger.debug("No messages found")
+        return "draft_response"
+    last_message = messages[-1]
+    if isinstance(last_message, (ToolMessage, HumanMessage, BaseMessage)):
+        return "draft_response"
+    tool_calls = get_tool_calls(last_message)
+    tool_name = tool_calls[0]["name"] if tool_calls else None
+    route = _HUMAN_ROUTES.get(tool_name)
+    if route is None:
+        logger.debug(f"Unknown tool name after human: {tool_name}")
+        return "draft_response"  # Default to draft_response if unknown
+    return route
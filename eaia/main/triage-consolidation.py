@@ -2,10 +2,15 @@
 Includes memory integration for improved contextual understanding.
 """
 
+import asyncio
+import functools
 import logging
+from typing import List, Optional
+
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import RemoveMessage
+from langchain_core.output_parsers import PydanticOutputParser
 from langgraph.store.base import BaseStore
 
 from eaia.schemas import (
@@ -14,11 +19,12 @@ from eaia.schemas import (
 )
 from eaia.main.fewshot import get_few_shot_examples
 from eaia.main.config import get_config
+from eaia.main.triage_cache import lookup_triage, record_triage
 from eaia.memory import retrieve_relevant_memories, format_memories_for_context
 
 logger = logging.getLogger(__name__)
 
-triage_prompt = """You are {full_name}'s executive assistant. You are a top-notch executive assistant who cares about {name} performing as well as possible.
+TRIAGE_SYSTEM_PROMPT = """You are {full_name}'s executive assistant. You are a top-notch executive assistant who cares about {name} performing as well as possible.
 
 {background}. 
 
@@ -35,9 +41,13 @@ There are also other things that {name} should know about, but don't require an
 
 For emails not worth responding to, respond `no`. For something where {name} should respond over email, respond `email`. If it's important to notify {name}, but no email is required, respond `notify`. \
 
-If unsure, opt to `notify` {name} - you will learn from this in the future.
+If unsure, opt to `notify` {name} - you will learn from this in the future."""
 
-{memories}
+# Everything that changes per email lives here, after the static system
+# prompt above, so provider-side prefix caching can reuse the instructions.
+def _render_triage_prompt(memories, fewshotexamples, author, to, subject, email_thread):
+    # f-string equivalent of the old triage_prompt.format(...), compiled once
+    return f"""{memories}
 
 {fewshotexamples}
 
@@ -50,46 +60,118 @@ Subject: {subject}
 {email_thread}"""
 
 
-async def triage_input(state: State, config: RunnableConfig, store: BaseStore):
-    """Triage an email with memory integration."""
+@functools.lru_cache(maxsize=8)
+def _triage_system_prompt(name, full_name, background, triage_no, triage_email, triage_notify):
+    """Format the triage system prompt once per distinct configuration."""
+    return TRIAGE_SYSTEM_PROMPT.format(
+        name=name,
+        full_name=full_name,
+        background=background,
+        triage_no=triage_no,
+        triage_email=triage_email,
+        triage_notify=triage_notify,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_triage_model(model_name: str, base_url: Optional[str] = None):
+    """Build the structured triage model once per model name and endpoint.
+
+    Reusing it keeps the client's HTTP connection pool alive across emails
+    and avoids re-deriving the RespondTo schema on every call. With a
+    ``base_url`` (a self-hosted vLLM server) the schema is enforced by
+    guided decoding, so the JSON is parsed directly instead of through a
+    forced tool call.
+    """
+    if base_url:
+        llm = ChatOpenAI(
+            model=model_name,
+            temperature=0,
+            base_url=base_url,
+            extra_body={"guided_json": RespondTo.schema()},
+        )
+        return llm | PydanticOutputParser(pydantic_object=RespondTo)
+    return ChatOpenAI(model=model_name, temperature=0).with_structured_output(
+        RespondTo
+    ).bind(tool_choice={"type": "function", "function": {"name": "RespondTo"}})
+
+
+def _triage_result(state: State, response: RespondTo):
+    """Build the node update, clearing any messages left from a previous run."""
+    if len(state["messages"]) > 0:
+        delete_messages = [RemoveMessage(id=m.id) for m in state["messages"]]
+        return {"triage": response, "messages": delete_messages}
+    else:
+        return {"triage": response}
+
+
+async def _triage_one(state: State, config: RunnableConfig, store: BaseStore):
+    """Triage a single email with memory integration."""
     try:
-        model = config["configurable"].get("model", "gpt-4o")
-        llm = ChatOpenAI(model=model, temperature=0)
+        email = state["email"]
+        subject = email["subject"]
+        author = email["from_email"]
+        body = email["page_content"]
+        configurable = config["configurable"]
+        assistant_id = configurable.get("assistant_id", "default")
+        query = f"{subject} {author} {body[:200]}"
         
-        # Get few-shot examples
-        examples = await get_few_shot_examples(state["email"], store, config)
+        # Near-duplicate emails from the same sender (newsletters,
+        # notifications) reuse an earlier decision instead of paying for
+        # another LLM call. save_email drops it once the user corrects it
+        try:
+            cached = await lookup_triage(store, assistant_id, email, query)
+        except Exception as e:
+            # A cache failure just means paying for the LLM call
+            logger.warning(f"Triage cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return _triage_result(state, cached)
         
-        # Retrieve relevant memories
-        query = f"{state['email']['subject']} {state['email']['from_email']} {state['email']['page_content'][:200]}"
-        memories = await retrieve_relevant_memories(query, config, store, limit=5)
+        # Get few-shot examples and relevant memories concurrently
+        examples, memories = await asyncio.gather(
+            get_few_shot_examples(email, store, config),
+            retrieve_relevant_memories(query, config, store, limit=5),
+        )
         formatted_memories = await format_memories_for_context(memories)
         
         prompt_config = get_config(config)
-        input_message = triage_prompt.format(
-            email_thread=state["email"]["page_content"],
-            author=state["email"]["from_email"],
-            to=state["email"].get("to_email", ""),
-            subject=state["email"]["subject"],
+        system_prompt = _triage_system_prompt(
+            prompt_config["name"],
+            prompt_config["full_name"],
+            prompt_config["background"],
+            prompt_config["triage_no"],
+            prompt_config["triage_email"],
+            prompt_config["triage_notify"],
+        )
+        input_message = _render_triage_prompt(
+            email_thread=body,
+            author=author,
+            to=email.get("to_email", ""),
+            subject=subject,
             fewshotexamples=examples,
             memories=formatted_memories,
-            name=prompt_config["name"],
-            full_name=prompt_config["full_name"],
-            background=prompt_config["background"],
-            triage_no=prompt_config["triage_no"],
-            triage_email=prompt_config["triage_email"],
-            triage_notify=prompt_config["triage_notify"],
         )
         
-        model = llm.with_structured_output(RespondTo).bind(
-            tool_choice={"type": "function", "function": {"name": "RespondTo"}}
+        # Triage is a small classification task, so it can be pointed at a
+        # cheaper (e.g. quantized, self-hosted) model than drafting uses
+        model = _get_triage_model(
+            configurable.get("triage_model") or configurable.get("model", "gpt-4o"),
+            configurable.get("triage_base_url"),
+        )
+        response = await model.ainvoke(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": input_message},
+            ]
         )
-        response = await model.ainvoke(input_message)
         
-        if len(state["messages"]) > 0:
-            delete_messages = [RemoveMessage(id=m.id) for m in state["messages"]]
-            return {"triage": response, "messages": delete_messages}
-        else:
-            return {"triage": response}
+        try:
+            await record_triage(store, assistant_id, email, query, response)
+        except Exception as e:
+            logger.warning(f"Triage cache write failed: {e}")
+        
+        return _triage_result(state, response)
     except Exception as e:
         logger.error(f"Error in triage_input: {e}")
         # Default to 'notify' in case of error to ensure user is aware
@@ -97,8 +179,36 @@ async def triage_input(state: State, config: RunnableConfig, store: BaseStore):
             logic="Error occurred during triage, defaulting to notify",
             response="notify"
         )
-        if len(state["messages"]) > 0:
-            delete_messages = [RemoveMessage(id=m.id) for m in state["messages"]]
-            return {"triage": error_response, "messages": delete_messages}
-        else:
-            return {"triage": error_response}
+        return _triage_result(state, error_response)
+
+
+# Upper bound on concurrent triage requests in a batch, so a large inbox
+# sweep doesn't open an unbounded number of connections to the model server
+MAX_INFLIGHT = 64
+
+
+async def triage_input_batch(
+    states: List[State],
+    config: RunnableConfig,
+    store: BaseStore,
+    max_inflight: int = MAX_INFLIGHT,
+):
+    """Triage several emails concurrently, returning one result per state.
+
+    The requests are issued together (up to ``max_inflight`` at a time) so a
+    batching model server can serve them in the same forward passes instead
+    of paying the full latency of each email in turn.
+    """
+    semaphore = asyncio.Semaphore(max_inflight)
+
+    async def run(state):
+        async with semaphore:
+            return await _triage_one(state, config, store)
+
+    return await asyncio.gather(*[run(state) for state in states])
+
+
+async def triage_input(state: State, config: RunnableConfig, store: BaseStore):
+    """Triage an email with memory integration."""
+    (result,) = await triage_input_batch([state], config, store)
+    return result
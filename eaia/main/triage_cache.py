@@ -0,0 +1,79 @@
+"""Reuse of triage decisions for near-duplicate emails from the same sender.
+
+Decisions are stored per sender and looked up by the embedding of the
+email's subject, sender and opening. When a lookup reuses an earlier
+decision, the key it came from is recorded under the new email's id, so
+a correction of either email drops the decision that was replayed.
+"""
+
+import asyncio
+import hashlib
+from typing import Optional
+
+from langgraph.store.base import BaseStore
+
+from eaia.schemas import RespondTo
+
+# Minimum similarity for an earlier email's triage decision to be reused.
+# Entries are also kept per sender, so this only has to separate one
+# sender's repeat emails (notifications, newsletters) from their others
+TRIAGE_CACHE_MIN_SCORE = 0.95
+
+
+def _sender_label(sender: str) -> str:
+    # Namespace labels can't contain periods, which every address has
+    return hashlib.sha1(sender.strip().lower().encode()).hexdigest()
+
+
+def _namespace(assistant_id: str, sender: str):
+    return (assistant_id, "triage_cache", _sender_label(sender))
+
+
+def _hits_namespace(assistant_id: str, sender: str):
+    # Kept apart from the decisions so searches never return a hit record
+    return (assistant_id, "triage_cache_hits", _sender_label(sender))
+
+
+async def lookup_triage(
+    store: BaseStore, assistant_id: str, email: dict, query: str
+) -> Optional[RespondTo]:
+    """Return the decision made for a near-duplicate of ``email``, or None."""
+    sender = email["from_email"]
+    cached = await store.asearch(_namespace(assistant_id, sender), query=query, limit=1)
+    if not cached or cached[0].score is None or cached[0].score < TRIAGE_CACHE_MIN_SCORE:
+        return None
+    source = cached[0]
+    await store.aput(
+        _hits_namespace(assistant_id, sender), email["id"], {"source": source.key}, index=False
+    )
+    return RespondTo(logic=source.value["logic"], response=source.value["response"])
+
+
+async def record_triage(
+    store: BaseStore, assistant_id: str, email: dict, query: str, response: RespondTo
+):
+    """Store the decision made for ``email`` for later near-duplicates."""
+    # Only the query text is embedded, so lookups match on the email
+    await store.aput(
+        _namespace(assistant_id, email["from_email"]),
+        email["id"],
+        {"content": query, **response.dict()},
+        index=["content"],
+    )
+
+
+async def forget_triage(store: BaseStore, assistant_id: str, email: dict):
+    """Drop the decision the user just corrected for ``email``.
+
+    That is the email's own entry and, if its decision was reused, the
+    entry it was copied from.
+    """
+    sender = email["from_email"]
+    namespace = _namespace(assistant_id, sender)
+    hits = _hits_namespace(assistant_id, sender)
+    hit = await store.aget(hits, email["id"])
+    deletes = [store.adelete(namespace, email["id"])]
+    if hit is not None:
+        deletes.append(store.adelete(namespace, hit.value["source"]))
+        deletes.append(store.adelete(hits, email["id"]))
+    await asyncio.gather(*deletes)
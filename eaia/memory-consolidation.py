@@ -4,27 +4,60 @@ This module provides memory capabilities for the Executive AI Assistant using La
 It handles setup, configuration, and utilities for both semantic and procedural memory.
 """
 
+import asyncio
+import atexit
+import functools
+import hashlib
 import logging
+import os
+import random
+import threading
+import time
 import uuid
+import weakref
+from collections import OrderedDict
+from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
 
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
+import openai
+import orjson
+from langchain.embeddings import init_embeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langgraph.store.base import BaseStore
+from langgraph.store.base import BaseStore, GetOp, PutOp
+from langgraph.store.memory import InMemoryStore
 from langmem import (
     create_manage_memory_tool, 
     create_search_memory_tool, 
     create_memory_manager,
     create_thread_extractor
 )
-from datetime import datetime
 
+from eaia._messages import convert_to_langchain_messages
 from eaia.schemas import EmailData
+from eaia.semantic_cache import SemanticCache
 from eaia.main.config import get_config
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(model: BaseModel) -> str:
+    """Serialize a pydantic v1 model to canonical JSON.
+
+    Store keys are hashed from this string, so it must not depend on what
+    is installed: orjson is required (langsmith already depends on it) and
+    keys are sorted. It also serializes several times faster than
+    pydantic's json(), which shows up when a backfill writes thousands of
+    contacts and preferences.
+    """
+    return orjson.dumps(model.dict(), option=orjson.OPT_SORT_KEYS).decode()
+
+
+def _content_key(prefix: str, content: str) -> str:
+    """Build a store key that is stable for identical content."""
+    return f"{prefix}_{hashlib.blake2b(content.encode(), digest_size=10).hexdigest()}"
+
+
 class ContactInfo(BaseModel):
     """Contact information for a person extracted from conversations."""
     name: str = Field(description="The person's name")
@@ -50,17 +83,193 @@ class ConversationSummary(BaseModel):
     follow_up_needed: bool = Field(description="Whether follow-up is needed")
 
 
+_QUERY_CACHE_SIZE = 1024
+_QUERY_CACHE_TTL = 600.0
+
+
+class _QueryEmbeddingCache(Embeddings):
+    """Wrap an ``Embeddings`` so repeated query strings are embedded once.
+    
+    retrieve_relevant_memories searches three namespaces with the same
+    query, and the store embeds each search separately; with this wrapper
+    they share one request. Documents are passed straight through.
+    """
+    
+    def __init__(self, embeddings: Embeddings, maxsize: int = _QUERY_CACHE_SIZE, ttl: float = _QUERY_CACHE_TTL):
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # query -> (timestamp, vector or in-flight future)
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def _lookup(self, text):
+        entry = self._cache.get(text)
+        if entry is None or entry[0] < time.time() - self.ttl:
+            return None
+        self._cache.move_to_end(text)
+        return entry[1]
+    
+    def _store(self, text, value):
+        self._cache[text] = (time.time(), value)
+        self._cache.move_to_end(text)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+    
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+    
+    async def aembed_documents(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+    
+    def embed_query(self, text):
+        cached = self._lookup(text)
+        if isinstance(cached, list):
+            return cached
+        vector = self.embeddings.embed_query(text)
+        self._store(text, vector)
+        return vector
+    
+    async def aembed_query(self, text):
+        cached = self._lookup(text)
+        if isinstance(cached, list):
+            return cached
+        # A future left in flight by another event loop can't be awaited here
+        if cached is None or cached.get_loop() is not asyncio.get_running_loop():
+            # Keep the future in the cache so concurrent searches share it
+            cached = asyncio.ensure_future(self.embeddings.aembed_query(text))
+            self._store(text, cached)
+        try:
+            vector = await asyncio.shield(cached)
+        except Exception:
+            self._cache.pop(text, None)
+            raise
+        self._store(text, vector)
+        return vector
+
+
+@functools.lru_cache(maxsize=2)
+def _get_embeddings(backend: str = "openai"):
+    """Return ``(embeddings, dims)`` for an embedding backend, built once.
+    
+    ``local`` runs all-MiniLM-L6-v2 in-process (384 dims, no network hop);
+    anything else uses OpenAI's text-embedding-3-small (1536 dims).
+    """
+    if backend == "local":
+        try:
+            import torch
+            from langchain_huggingface import HuggingFaceEmbeddings
+        except ImportError:
+            logger.warning(
+                "embedding_backend is 'local' but langchain-huggingface is not "
+                "installed; falling back to OpenAI embeddings"
+            )
+        else:
+            embeddings = HuggingFaceEmbeddings(
+                model_name="sentence-transformers/all-MiniLM-L6-v2",
+                model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+            )
+            return _QueryEmbeddingCache(embeddings), 384
+    return _QueryEmbeddingCache(init_embeddings("openai:text-embedding-3-small")), 1536
+
+
+def _embedding_index(config=None):
+    """Build the store index config for the configured embedding backend."""
+    embeddings, dims = _get_embeddings(get_config(config).get("embedding_backend", "openai"))
+    return {"dims": dims, "embed": embeddings}
+
+
 def setup_memory_store(config=None):
-    """Configure and initialize the memory store with embeddings."""
-    from langgraph.store.memory import InMemoryStore
-    
-    store = InMemoryStore(
-        index={
-            "dims": 1536,
-            "embed": "openai:text-embedding-3-small",
-        }
-    )
-    return store
+    """Configure and initialize the memory store with embeddings.
+    
+    ``memory_store: faiss`` in config.yaml keeps memories in process but searches them
+    through per-namespace FAISS HNSW indexes, checkpointed to
+    ``memory_index_path``. ``memory_store: sqlite`` keeps them in
+    ``memory_db_path`` and runs vector search inside SQLite via sqlite-vec.
+    The default is the in-process InMemoryStore.
+    
+    Stores are built once per process for each distinct setting, so every
+    caller shares the same memories instead of getting a fresh empty store.
+    """
+    prompt_config = get_config(config)
+    with _store_lock:
+        return _build_memory_store(
+            prompt_config.get("memory_store"),
+            prompt_config.get("memory_index_path", "eaia_memory/memory.faiss"),
+            prompt_config.get("memory_db_path", "eaia_memory/memory.db"),
+            prompt_config.get("embedding_backend", "openai"),
+        )
+
+
+_store_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _build_memory_store(backend, index_path, db_path, embedding_backend):
+    embeddings, dims = _get_embeddings(embedding_backend)
+    index = {"dims": dims, "embed": embeddings}
+    if backend == "faiss":
+        try:
+            from eaia.faiss_store import FAISSBackedStore
+        except ImportError:
+            logger.warning(
+                "memory_store is 'faiss' but faiss is not installed; "
+                "falling back to InMemoryStore"
+            )
+        else:
+            store = FAISSBackedStore(index=index, path=index_path)
+            # Checkpoints only run every few writes, so flush the rest on exit
+            atexit.register(store.checkpoint)
+            return store
+    elif backend == "sqlite":
+        try:
+            from eaia.sqlite_store import ThreadedSqliteStore
+        except ImportError:
+            logger.warning(
+                "memory_store is 'sqlite' but langgraph-checkpoint-sqlite is "
+                "not installed; falling back to InMemoryStore"
+            )
+        else:
+            return ThreadedSqliteStore.open(db_path, index)
+    elif backend not in (None, "memory"):
+        logger.warning(f"Unknown memory_store {backend!r}; using InMemoryStore")
+    
+    return InMemoryStore(index=index)
+
+
+# Prompt preferences rarely change between emails, so reads are cached per
+# process for a short time. Writers call invalidate_preference after aput.
+_PREFERENCE_TTL = 60.0
+_preference_cache: Dict[Tuple[Tuple[str, ...], str], Tuple[float, Any]] = {}
+
+
+async def get_preference(store: BaseStore, namespace, key):
+    """Read a stored prompt preference, returning None if it is not set.
+    
+    Args:
+        store: BaseStore instance
+        namespace: The namespace tuple the preference lives under
+        key: The preference key
+        
+    Returns:
+        The stored ``data`` value, or None
+    """
+    cache_key = (tuple(namespace), key)
+    now = time.monotonic()
+    cached = _preference_cache.get(cache_key)
+    if cached is not None and now - cached[0] < _PREFERENCE_TTL:
+        return cached[1]
+    
+    result = await store.aget(namespace, key)
+    if result and "data" in result.value:
+        value = result.value["data"]
+        _preference_cache[cache_key] = (now, value)
+        return value
+    return None
+
+
+def invalidate_preference(namespace, key):
+    """Drop a cached preference so the next read goes to the store."""
+    _preference_cache.pop((tuple(namespace), key), None)
 
 
 def get_memory_namespace(config, store_type="memories"):
@@ -137,9 +346,13 @@ def create_background_memory_manager(config=None):
         A memory manager function
     """
     model = config.get("configurable", {}).get("model", "gpt-4o") if config else "gpt-4o"
-    
-    # Create memory manager with custom instructions
-    manager = create_memory_manager(
+    return _get_memory_manager(model)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_memory_manager(model: str):
+    """Build the background memory manager for ``model`` once and reuse it."""
+    return create_memory_manager(
         model,
         instructions="""
         Extract key information from email conversations. Focus on:
@@ -152,38 +365,173 @@ def create_background_memory_manager(config=None):
         Avoid storing transient information or overly specific details that won't be relevant later.
         """
     )
+
+
+# Caps concurrent extractor/manager LLM calls across all threads, so a
+# backfill over many emails queues here instead of bursting into 429s
+_LLM_CONCURRENCY = int(os.getenv("EAIA_LLM_CONCURRENCY", "10"))
+_LLM_RETRIES = 3
+_LLM_RETRY_DELAY = 1.0
+# A semaphore binds to the loop it is first contended on, and the graph
+# may be driven from several loops, so each loop gets its own
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(_LLM_CONCURRENCY)
+    return semaphore
+
+
+async def _call_llm(fn, *args):
+    """Await ``fn(*args)`` under the loop's LLM semaphore, backing off on rate limits.
     
-    return manager
+    The semaphore is released while sleeping so other calls can proceed.
+    """
+    for attempt in range(_LLM_RETRIES + 1):
+        try:
+            async with _llm_semaphore():
+                return await fn(*args)
+        except openai.RateLimitError:
+            if attempt == _LLM_RETRIES:
+                raise
+            delay = _LLM_RETRY_DELAY * 2 ** attempt
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+
+@functools.cache
+def _get_extraction_cache():
+    """Semantic cache shared by the extractors, built on first use."""
+    # Persisted so a restart doesn't re-embed and re-extract recent threads
+    cache_dir = os.path.expanduser(os.getenv("EAIA_CACHE_DIR", "~/.eaia"))
+    return SemanticCache(
+        _embedding_index()["embed"],
+        path=os.path.join(cache_dir, "cache.db"),
+        dumps=_dumps,
+        loads=CombinedExtraction.parse_raw,
+    )
 
 
-async def extract_conversation_summary(messages, config=None):
-    """Extract a structured summary from a conversation.
+def _thread_segments(messages):
+    """Message contents in order, embedded per message by the extraction cache."""
+    return [
+        str(m.get("content", "") if isinstance(m, dict) else getattr(m, "content", ""))
+        for m in messages
+    ]
+
+
+async def _cached_extract(kind, messages, config, extract, thread_id=None):
+    """Run ``extract(messages)`` unless this thread was already extracted.
+    
+    Entries are kept per assistant, user, extractor kind and thread, so a
+    look-alike email from another thread (e.g. a recurring notification
+    from a different sender) never reuses its summary and contacts, which
+    would then be stored as memories. Without a thread id nothing is cached.
+    """
+    if thread_id is None:
+        return await _call_llm(extract, messages)
+    configurable = (config or {}).get("configurable", {})
+    namespace = (
+        configurable.get("assistant_id", "default"),
+        configurable.get("user_id", "default_user"),
+        kind,
+        thread_id,
+    )
+    text = _thread_segments(messages)
+    cache = _get_extraction_cache()
+    try:
+        cached = await cache.aget(namespace, text)
+    except Exception as e:
+        # A cache failure just means paying for the LLM call
+        logger.warning(f"Extraction cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        return cached
+    
+    result = await _call_llm(extract, messages)
+    try:
+        await cache.aput(namespace, text, result)
+    except Exception as e:
+        logger.warning(f"Extraction cache write failed: {e}")
+    return result
+
+
+class CombinedExtraction(BaseModel):
+    """Everything extracted from a conversation in a single pass."""
+    summary: ConversationSummary = Field(description="Summary of the conversation")
+    contacts: List[ContactInfo] = Field(description="List of contacts extracted from the conversation")
+    preferences: List[EmailPreference] = Field(description="List of preferences extracted from the conversation")
+
+
+async def extract_all(messages, config=None, thread_id=None):
+    """Extract the summary, contacts and preferences from a conversation at once.
+    
+    One extractor call reads the thread once instead of three separate
+    calls each re-sending the same conversation.
     
     Args:
         messages: List of messages in the conversation
         config: Configuration dictionary
+        thread_id: Id of the email thread, which scopes the extraction cache
         
     Returns:
-        A ConversationSummary object
+        A CombinedExtraction object
     """
     model = config.get("configurable", {}).get("model", "gpt-4o") if config else "gpt-4o"
-    
-    extractor = create_thread_extractor(
+    return await _cached_extract("combined", messages, config, _get_extractor(model), thread_id)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_extractor(model: str):
+    """Build the combined thread extractor for ``model`` once and reuse it."""
+    return create_thread_extractor(
         model,
-        schema=ConversationSummary,
+        schema=CombinedExtraction,
         instructions="""
-        Analyze this email conversation and extract:
+        Analyze this email conversation and extract the following.
+        
+        Summary:
         1. The main subject or topic
         2. All participants (by email)
         3. Key points discussed
         4. Any action items or follow-up tasks
         5. Whether follow-up is needed
-        
         Focus on information that would be helpful for future reference.
+        
+        Contacts, for all people mentioned:
+        1. Names
+        2. Email addresses
+        3. Companies they work for
+        4. Roles or titles
+        5. Relationship to the user
+        Only include information explicitly mentioned in the conversation.
+        
+        User preferences related to:
+        1. Email communication style
+        2. Meeting scheduling preferences
+        3. Response formats or templates
+        4. Tone preferences
+        5. Types of emails to prioritize or ignore
+        Include a confidence score for each preference based on how explicitly it was stated.
         """
     )
+
+
+async def extract_conversation_summary(messages, config=None):
+    """Extract a structured summary from a conversation.
     
-    return await extractor(messages)
+    Args:
+        messages: List of messages in the conversation
+        config: Configuration dictionary
+        
+    Returns:
+        A ConversationSummary object
+    """
+    return (await extract_all(messages, config)).summary
 
 
 async def extract_contact_information(messages, config=None):
@@ -196,29 +544,7 @@ async def extract_contact_information(messages, config=None):
     Returns:
         A list of ContactInfo objects
     """
-    model = config.get("configurable", {}).get("model", "gpt-4o") if config else "gpt-4o"
-    
-    class ContactsExtraction(BaseModel):
-        contacts: List[ContactInfo] = Field(description="List of contacts extracted from the conversation")
-    
-    extractor = create_thread_extractor(
-        model,
-        schema=ContactsExtraction,
-        instructions="""
-        Analyze this email conversation and extract contact information for all people mentioned.
-        Include:
-        1. Names
-        2. Email addresses
-        3. Companies they work for
-        4. Roles or titles
-        5. Relationship to the user
-        
-        Only include information explicitly mentioned in the conversation.
-        """
-    )
-    
-    result = await extractor(messages)
-    return result.contacts
+    return (await extract_all(messages, config)).contacts
 
 
 async def extract_user_preferences(messages, config=None):
@@ -231,28 +557,29 @@ async def extract_user_preferences(messages, config=None):
     Returns:
         A list of EmailPreference objects
     """
-    model = config.get("configurable", {}).get("model", "gpt-4o") if config else "gpt-4o"
-    
-    class PreferencesExtraction(BaseModel):
-        preferences: List[EmailPreference] = Field(description="List of preferences extracted from the conversation")
-    
-    extractor = create_thread_extractor(
-        model,
-        schema=PreferencesExtraction,
-        instructions="""
-        Analyze this email conversation and extract any user preferences related to:
-        1. Email communication style
-        2. Meeting scheduling preferences
-        3. Response formats or templates
-        4. Tone preferences
-        5. Types of emails to prioritize or ignore
-        
-        Include a confidence score for each preference based on how explicitly it was stated.
-        """
+    return (await extract_all(messages, config)).preferences
+
+
+async def _write_all(store: BaseStore, writes):
+    """Apply ``writes`` in one batch, falling back to one op at a time.
+
+    A single bad op (e.g. one document the embedder rejects) fails the
+    whole batch, so on failure each op is retried on its own and only the
+    ones that fail again are dropped.
+    """
+    try:
+        await store.abatch(writes)
+        return
+    except Exception as e:
+        logger.warning(f"Batched memory write failed, retrying each op: {e}")
+    results = await asyncio.gather(
+        *(store.abatch([op]) for op in writes), return_exceptions=True
     )
-    
-    result = await extractor(messages)
-    return result.preferences
+    for op, result in zip(writes, results):
+        if isinstance(result, Exception):
+            logger.error(
+                f"Error storing memory {op.key} in {'/'.join(op.namespace)}: {result}"
+            )
 
 
 async def process_email_for_memory(email_data: EmailData, messages, config, store: BaseStore):
@@ -265,83 +592,84 @@ async def process_email_for_memory(email_data: EmailData, messages, config, stor
         store: BaseStore instance
     """
     try:
-        # Extract structured information
-        conversation_summary = await extract_conversation_summary(messages, config)
-        contacts = await extract_contact_information(messages, config)
-        preferences = await extract_user_preferences(messages, config)
+        # The combined extractor and the background manager read the same
+        # messages independently, so run the two LLM calls concurrently.
+        # Callers pass messages already run through
+        # convert_to_langchain_messages, so they are used as-is
+        manager = create_background_memory_manager(config)
+        results = await asyncio.gather(
+            extract_all(messages, config, email_data.get("thread_id")),
+            _call_llm(manager, messages),
+            return_exceptions=True,
+        )
+        # One failed extraction shouldn't stop the other from being stored
+        for name, result in zip(("summary, contacts and preferences", "memories"), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error extracting {name} for memory: {result}")
+                logger.exception(result)
+        extraction, memories = (
+            None if isinstance(result, Exception) else result for result in results
+        )
+        conversation_summary = extraction.summary if extraction else None
+        contacts = extraction.contacts if extraction else None
+        preferences = extraction.preferences if extraction else None
+        
+        # Summaries, contacts and preferences are keyed by a hash of their
+        # content, so re-extracting the same thread doesn't add duplicates
+        # and distinct contacts sharing a name don't overwrite each other
+        keyed = []
         
         # Store conversation summary
         memories_namespace = get_memory_namespace(config, "memories")
-        await store.aput(
-            memories_namespace,
-            str(uuid.uuid4()),
-            {
-                "content": f"Email thread: {email_data['subject']}\n" +
-                        f"Key points: {', '.join(conversation_summary.key_points)}\n" +
-                        (f"Action items: {', '.join(conversation_summary.action_items)}\n" if conversation_summary.action_items else "") +
-                        f"Follow-up needed: {conversation_summary.follow_up_needed}"
-            }
-        )
+        if conversation_summary is not None:
+            content = (
+                f"Email thread: {email_data['subject']}\n" +
+                f"Key points: {', '.join(conversation_summary.key_points)}\n" +
+                (f"Action items: {', '.join(conversation_summary.action_items)}\n" if conversation_summary.action_items else "") +
+                f"Follow-up needed: {conversation_summary.follow_up_needed}"
+            )
+            keyed.append(PutOp(memories_namespace, _content_key("summary", content), {"content": content}))
         
         # Store contact information
         if contacts:
             contacts_namespace = get_memory_namespace(config, "contacts")
             for contact in contacts:
-                contact_key = f"contact_{contact.name.lower().replace(' ', '_')}"
-                await store.aput(
-                    contacts_namespace,
-                    contact_key,
-                    {"content": contact.model_dump_json()}
-                )
+                content = _dumps(contact)
+                keyed.append(PutOp(contacts_namespace, _content_key("contact", content), {"content": content}))
         
         # Store preferences
         if preferences:
             preferences_namespace = get_memory_namespace(config, "preferences")
             for preference in preferences:
-                pref_key = f"preference_{preference.type.lower().replace(' ', '_')}"
-                await store.aput(
-                    preferences_namespace,
-                    pref_key,
-                    {"content": preference.model_dump_json()}
-                )
+                content = _dumps(preference)
+                keyed.append(PutOp(preferences_namespace, _content_key("preference", content), {"content": content}))
         
-        # Process email for background memory extraction
-        manager = create_background_memory_manager(config)
-        formatted_messages = convert_to_langchain_messages(messages)
-        memories = await manager(formatted_messages)
+        # Skip content that is already stored, checking every key in one
+        # batch; an insert costs an embedding and an index update
+        writes = []
+        if keyed:
+            existing = await store.abatch([GetOp(op.namespace, op.key) for op in keyed])
+            writes = [op for op, item in zip(keyed, existing) if item is None]
         
         # Store extracted memories
-        for memory in memories:
-            await store.aput(
+        for memory in memories or ():
+            writes.append(PutOp(
                 memories_namespace,
                 str(uuid.uuid4()),
                 {"content": memory}
-            )
+            ))
+        
+        # The writes are independent, so send them as one batch rather than
+        # one awaited round trip each; stores that embed on write can then
+        # embed every document in a single request too
+        if writes:
+            await _write_all(store, writes)
     except Exception as e:
         # Log error but don't fail the main process
         logger.error(f"Error processing email for memory: {e}")
         logger.exception(e)
 
 
-def convert_to_langchain_messages(messages):
-    """Convert messages to a format that LangMem can process."""
-    result = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            if msg.get("role") == "user":
-                result.append(HumanMessage(content=msg.get("content", "")))
-            elif msg.get("role") == "assistant":
-                result.append(AIMessage(content=msg.get("content", "")))
-            elif msg.get("role") == "system":
-                result.append(SystemMessage(content=msg.get("content", "")))
-            elif msg.get("type") == "tool":
-                result.append(ToolMessage(content=msg.get("content", "")))
-        else:
-            # Already a LangChain message
-            result.append(msg)
-    return result
-
-
 async def retrieve_relevant_memories(query, config, store: BaseStore, limit=5):
     """Retrieve memories relevant to the current query.
     
@@ -359,10 +687,13 @@ async def retrieve_relevant_memories(query, config, store: BaseStore, limit=5):
         contacts_namespace = get_memory_namespace(config, "contacts")
         preferences_namespace = get_memory_namespace(config, "preferences")
         
-        # Search all namespaces
-        memories = await store.asearch(memories_namespace, query=query, limit=limit)
-        contacts = await store.asearch(contacts_namespace, query=query, limit=limit)
-        preferences = await store.asearch(preferences_namespace, query=query, limit=limit)
+        # Search all namespaces concurrently; the store's embeddings cache
+        # query vectors, so the shared query is only embedded once
+        memories, contacts, preferences = await asyncio.gather(
+            store.asearch(memories_namespace, query=query, limit=limit),
+            store.asearch(contacts_namespace, query=query, limit=limit),
+            store.asearch(preferences_namespace, query=query, limit=limit),
+        )
         
         results = []
         
@@ -401,11 +732,7 @@ async def format_memories_for_context(memories):
     if not memories:
         return ""
         
-    result = "## Relevant Memories\n\n"
-    for memory in memories:
-        result += f"- {memory}\n"
-    
-    return result
+    return "## Relevant Memories\n\n" + "".join(f"- {memory}\n" for memory in memories)
 
 
 def _extract_conversation_summary(messages: List[Any]) -> str:
@@ -434,19 +761,35 @@ def _extract_conversation_summary(messages: List[Any]) -> str:
     return "\n".join(summary)
 
 
+def _role(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("role", "")
+    return getattr(message, "role", "")
+
+
+def _content(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("content", "")
+    return getattr(message, "content", "")
+
+
 def _get_response(messages: List[Any]) -> str:
     """
     Get the final response from the conversation.
     Safely handles both dictionary and object messages.
     """
-    # Find the last assistant message
-    for message in reversed(messages):
-        is_dict = isinstance(message, dict)
-        
-        if is_dict and message.get("role") == "assistant":
-            return message.get("content", "")
-        elif not is_dict and getattr(message, "role", "") == "assistant":
-            return getattr(message, "content", "")
+    if not messages:
+        return ""
+    
+    # The assistant reply is almost always one of the last two messages
+    for message in messages[-1:-3:-1]:
+        if _role(message) == "assistant":
+            return _content(message)
+    
+    # Fall back to scanning the rest of the conversation
+    for message in reversed(messages[:-2]):
+        if _role(message) == "assistant":
+            return _content(message)
     
     return ""
 
@@ -455,25 +798,3 @@ def _get_current_timestamp():
     """Get current timestamp for memory entry."""
     return datetime.now().isoformat()
 
-
-def _safely_prepare_messages_for_conversion(messages):
-    """
-    Prepare messages for conversion to langchain format, ensuring dictionary access is used for dictionaries.
-    """
-    prepared_messages = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            # Make a copy to avoid modifying the original
-            prepared_msg = msg.copy()
-            
-            # Ensure tool_calls is properly formatted as a list if it exists
-            if "tool_calls" in prepared_msg and prepared_msg["tool_calls"]:
-                if not isinstance(prepared_msg["tool_calls"], list):
-                    prepared_msg["tool_calls"] = [prepared_msg["tool_calls"]]
-            
-            prepared_messages.append(prepared_msg)
-        else:
-            # It's an object, so we can append it directly
-            prepared_messages.append(msg)
-    
-    return prepared_messages
@@ -9,6 +9,8 @@ from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.types import Command, Send
 from langmem import create_memory_manager, create_prompt_optimizer, Prompt
 
+from eaia.memory import invalidate_preference
+
 logger = logging.getLogger(__name__)
 
 TONE_INSTRUCTIONS = "Only update the prompt to include instructions on the **style and tone and format** of the response. Do NOT update the prompt to include anything about the actual content - only the style and tone and format. The user sometimes responds differently to different types of people - take that into account, but don't be too specific."
@@ -105,6 +107,7 @@ async def update_general(state: ReflectionState, config, store: BaseStore):
             await store.aput(
                 namespace, key, {"data": output["new_prompt"]}, index=False
             )
+            invalidate_preference(namespace, key)
             
             # Store the updated prompt in memory for future reference
             memories_namespace = (state["assistant_key"], "memories", "system_prompts")
@@ -284,6 +287,7 @@ async def optimize_from_feedback(state: MemoryReflectionState, config, store: Ba
                 {"data": updated_prompt["prompt"]},
                 index=False
             )
+            invalidate_preference(namespace, updated_prompt["name"])
             
             # Also store in memory
             memories_namespace = (state["assistant_key"], "memories", "system_prompts")
@@ -35,6 +35,7 @@ class State(TypedDict):
     triage: Optional[str]
     feedback: Optional[str]
     prompt_types: Optional[List[str]]
+    meeting_mentioned: Optional[bool]
 
 
 class RespondTo(BaseModel):
@@ -0,0 +1,270 @@
+"""Semantic cache for LLM extraction results.
+
+Results are looked up by embedding similarity, so near-duplicate inputs
+(forwards, replies, reminders of the same thread) reuse an earlier result
+instead of paying for another LLM call. Entries can be persisted to a
+SQLite file so they (and their embeddings) survive restarts.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# FAISS gives an exact inner-product search in C. Without it the cache
+# scores every entry with one NumPy matmul, and only falls back to a
+# Python loop when NumPy is missing as well.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_TTL = 7 * 24 * 60 * 60
+MAX_TEXT_CHARS = 8000
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class _Index:
+    """Exact inner-product index over normalised vectors for one namespace."""
+
+    def __init__(self):
+        self.index = None  # FAISS index, created on first add
+        # Without FAISS, rows are kept in a float32 matrix that doubles in
+        # capacity as it fills, so adds stay amortised O(1)
+        self.matrix = None
+        self.vectors: List[List[float]] = []
+        # (timestamp, payload, digest of the newest segment) per row
+        self.entries: List[Tuple[float, Any, bytes]] = []
+
+    def add(self, vector: List[float], payload: Any, timestamp: float, tail: bytes):
+        if faiss is not None:
+            row = np.asarray([vector], dtype="float32")
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(row.shape[1])
+            self.index.add(row)
+        elif np is not None:
+            size = len(self.vectors)
+            if self.matrix is None or size == len(self.matrix):
+                grown = np.empty((max(16, 2 * size), len(vector)), dtype="float32")
+                if size:
+                    grown[:size] = self.matrix
+                self.matrix = grown
+            self.matrix[size] = vector
+        self.vectors.append(vector)
+        self.entries.append((timestamp, payload, tail))
+
+    def nearest(self, vector: List[float]) -> Tuple[float, int]:
+        """Return the best (score, row) for ``vector``, or (-1.0, -1) if empty."""
+        if not self.entries:
+            return -1.0, -1
+        if faiss is not None:
+            scores, ids = self.index.search(np.asarray([vector], dtype="float32"), 1)
+            return float(scores[0][0]), int(ids[0][0])
+        if np is not None:
+            scores = self.matrix[: len(self.vectors)] @ np.asarray(vector, dtype="float32")
+            row = int(scores.argmax())
+            return float(scores[row]), row
+        best, best_row = -1.0, -1
+        for row, other in enumerate(self.vectors):
+            score = sum(a * b for a, b in zip(other, vector))
+            if score > best:
+                best, best_row = score, row
+        return best, best_row
+
+    def evict_before(self, cutoff: float):
+        """Drop entries older than ``cutoff`` and rebuild the index."""
+        kept = [
+            (vector, entry)
+            for vector, entry in zip(self.vectors, self.entries)
+            if entry[0] >= cutoff
+        ]
+        self.index = self.matrix = None
+        self.vectors, self.entries = [], []
+        for vector, entry in kept:
+            self.add(vector, *entry)
+
+
+class SemanticCache:
+    """Cache payloads per namespace, keyed by the embedding of their input text.
+
+    The input may be a single string or a sequence of segments (e.g. the
+    messages of a thread). Segments are embedded individually and
+    mean-pooled, so when a thread grows by one reply only the new message
+    has to be embedded. A mean over many messages barely moves when one is
+    added, so a hit also requires the newest segment to be identical: a
+    thread that gained a reply always misses.
+
+    Args:
+        embeddings: A LangChain ``Embeddings`` instance used to embed text
+        threshold: Minimum cosine similarity for a cached payload to be reused
+        ttl: Seconds after which a cached payload is no longer returned
+        max_embeddings: How many recent segment embeddings to keep in memory
+        path: SQLite file to persist entries to, loaded on first use; None
+            keeps the cache in memory only
+        dumps: Serializes a payload to a JSON string for ``path``
+        loads: Rebuilds a payload from the string ``dumps`` returned
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        max_embeddings: int = 1024,
+        path: Optional[str] = None,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_embeddings = max_embeddings
+        self.path = path
+        self.dumps = dumps
+        self.loads = loads
+        self._db: Optional[sqlite3.Connection] = None
+        self._indexes: Dict[Tuple[str, ...], _Index] = {}
+        # SHA1 of segment -> its vector, or (embedding task, row in its
+        # batch) while in flight so concurrent lookups share one request
+        self._embedded: "OrderedDict[bytes, Union[List[float], Tuple[asyncio.Future, int]]]" = OrderedDict()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open ``path`` on first use and load its unexpired entries."""
+        if self._db is not None or self.path is None:
+            return self._db
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache ("
+            "namespace TEXT NOT NULL, vector BLOB NOT NULL, payload TEXT NOT NULL, "
+            "ts REAL NOT NULL, tail BLOB NOT NULL)"
+        )
+        db.execute("DELETE FROM semantic_cache WHERE ts < ?", (time.time() - self.ttl,))
+        rows = db.execute("SELECT namespace, vector, payload, ts, tail FROM semantic_cache ORDER BY ts")
+        for namespace, blob, payload, timestamp, tail in rows:
+            try:
+                payload = self.loads(payload)
+            except Exception as e:
+                # e.g. the payload's schema changed since it was cached
+                logger.debug(f"Skipping unreadable semantic cache entry: {e}")
+                continue
+            vector = array("f")
+            vector.frombytes(blob)
+            index = self._indexes.setdefault(tuple(json.loads(namespace)), _Index())
+            index.add(vector.tolist(), payload, timestamp, tail)
+        self._db = db
+        return db
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [_normalize(v) for v in await self.embeddings.aembed_documents(texts)]
+
+    async def _segment_vectors(self, segments: List[str]) -> List[List[float]]:
+        """Embed each segment, reusing cached vectors and batching the misses."""
+        loop = asyncio.get_running_loop()
+        keys = [hashlib.sha1(text.encode()).digest() for text in segments]
+        missing = {}
+        for key, text in zip(keys, segments):
+            entry = self._embedded.get(key)
+            # A batch still in flight on another event loop can't be awaited here
+            if entry is not None and (isinstance(entry, list) or entry[0].get_loop() is loop):
+                self._embedded.move_to_end(key)
+            elif key not in missing:
+                missing[key] = text
+        if missing:
+            batch = asyncio.ensure_future(self._embed_batch(list(missing.values())))
+            for row, key in enumerate(missing):
+                self._embedded[key] = (batch, row)
+        # Resolve tasks before evicting, in case this thread alone overflows
+        pending = {key: self._embedded[key] for key in keys}
+        while len(self._embedded) > self.max_embeddings:
+            self._embedded.popitem(last=False)
+        vectors = []
+        for key in keys:
+            entry = pending[key]
+            if isinstance(entry, list):
+                vectors.append(entry)
+                continue
+            task, row = entry
+            try:
+                vector = (await asyncio.shield(task))[row]
+            except Exception:
+                self._embedded.pop(key, None)
+                raise
+            # Keep the plain vector, which any loop can reuse
+            if self._embedded.get(key) is entry:
+                self._embedded[key] = vector
+            vectors.append(vector)
+        return vectors
+
+    @staticmethod
+    def _segments(text: Union[str, Sequence[str]]) -> List[str]:
+        """Split ``text`` into non-empty segments truncated to MAX_TEXT_CHARS."""
+        segments = [text] if isinstance(text, str) else list(text)
+        return [segment[:MAX_TEXT_CHARS] for segment in segments if segment] or [""]
+
+    async def embed(self, text: Union[str, Sequence[str]]) -> List[float]:
+        """Embed ``text`` as a unit vector.
+
+        A sequence of segments is mean-pooled. Segments are truncated to
+        MAX_TEXT_CHARS and empty segments are ignored.
+        """
+        segments = self._segments(text)
+        vectors = await self._segment_vectors(segments)
+        if len(vectors) == 1:
+            return vectors[0]
+        return _normalize([sum(column) / len(vectors) for column in zip(*vectors)])
+
+    async def aget(self, namespace, text: Union[str, Sequence[str]]) -> Optional[Any]:
+        """Return a copy of the closest cached payload, or None on a miss."""
+        db = self._connect()
+        index = self._indexes.get(tuple(namespace))
+        if index is None or not index.entries:
+            return None
+        segments = self._segments(text)
+        vector = await self.embed(segments)
+        score, row = index.nearest(vector)
+        if row >= 0 and index.entries[row][0] < time.time() - self.ttl:
+            # Expired entries are evicted lazily, when a lookup lands on one
+            index.evict_before(time.time() - self.ttl)
+            if db is not None:
+                db.execute("DELETE FROM semantic_cache WHERE ts < ?", (time.time() - self.ttl,))
+            score, row = index.nearest(vector)
+        if row < 0 or score < self.threshold:
+            return None
+        if index.entries[row][2] != hashlib.sha1(segments[-1].encode()).digest():
+            return None
+        return copy.deepcopy(index.entries[row][1])
+
+    async def aput(self, namespace, text: Union[str, Sequence[str]], payload: Any):
+        """Cache ``payload`` under the embedding of ``text``."""
+        db = self._connect()
+        segments = self._segments(text)
+        vector = await self.embed(segments)
+        timestamp = time.time()
+        tail = hashlib.sha1(segments[-1].encode()).digest()
+        index = self._indexes.setdefault(tuple(namespace), _Index())
+        index.add(vector, copy.deepcopy(payload), timestamp, tail)
+        if db is not None:
+            db.execute(
+                "INSERT INTO semantic_cache (namespace, vector, payload, ts, tail) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(list(namespace)), array("f", vector).tobytes(), self.dumps(payload), timestamp, tail),
+            )
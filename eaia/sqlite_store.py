@@ -0,0 +1,34 @@
+"""Persistent LangGraph store with vector search in SQLite via sqlite-vec.
+
+LangGraph's SqliteStore only implements the sync API, and its
+AsyncSqliteStore binds to the event loop it was created on, while the
+memory store is built once per process and shared by every loop that runs
+the graph. This store keeps the sync implementation but runs each async
+batch in a worker thread, so neither the SQLite calls nor the document
+embeddings block the event loop, whichever loop awaits them.
+"""
+
+import asyncio
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List
+
+from langgraph.store.base import Op, Result
+from langgraph.store.sqlite import SqliteStore
+
+
+class ThreadedSqliteStore(SqliteStore):
+    """SqliteStore whose async methods run the sync batch off the event loop."""
+
+    @classmethod
+    def open(cls, path: str, index: Dict[str, Any]) -> "ThreadedSqliteStore":
+        """Open (creating if needed) the store at ``path`` and run its migrations."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Batches run on worker threads; SqliteStore serializes them with its lock
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        store = cls(conn, index=index)
+        store.setup()
+        return store
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.to_thread(self.batch, list(ops))
@@ -1,36 +1,78 @@
 import os
+import subprocess
 import sys
 import glob
 
+INBOX_FILES = ('modified_human_inbox.py', 'modified-human-inbox.py')
+
+def iter_py(root):
+    """Yield the path of every .py file under root.
+
+    scandir's DirEntry caches the file type, so no extra stat is needed
+    per entry to tell files from directories.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_py(entry.path)
+            elif entry.name.endswith('.py'):
+                yield entry.path
+
+_py_files = None
+
+def git_py_files():
+    """List .py files from git's index (plus untracked, non-ignored files).
+
+    Returns None outside a git checkout or when git isn't installed.
+    """
+    try:
+        out = subprocess.check_output(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard', '*.py'],
+            stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # Only files that still exist: deleted-but-tracked paths stay in the index
+    paths = (os.path.join('.', p.decode()) for p in out.split(b'\x00') if p)
+    return sorted(set(p for p in paths if os.path.isfile(p)))
+
+def py_files():
+    """All .py files under the working directory, listed once.
+
+    git already indexes the tree, so ask it first and only walk the
+    filesystem when that isn't available.
+    """
+    global _py_files
+    if _py_files is None:
+        _py_files = git_py_files()
+        if _py_files is None:
+            _py_files = list(iter_py('.'))
+    return _py_files
+
 def list_modified_files():
     """List all files with 'modified' in the name."""
     print("=== Files with 'modified' in the name ===")
     modified_files = []
-    for root, _, files in os.walk('.'):
-        for file in files:
-            if 'modified' in file and file.endswith('.py'):
-                full_path = os.path.join(root, file)
-                modified_files.append(full_path)
-                print(full_path)
+    for full_path in py_files():
+        if 'modified' in os.path.basename(full_path):
+            modified_files.append(full_path)
+            print(full_path)
     return modified_files
 
 def list_memory_files():
     """List all files related to memory functionality."""
     print("\n=== Files related to memory ===")
-    for root, _, files in os.walk('.'):
-        for file in files:
-            if ('memory' in file.lower() or 'langmem' in file.lower()) and file.endswith('.py'):
-                print(os.path.join(root, file))
+    for full_path in py_files():
+        file = os.path.basename(full_path).lower()
+        if 'memory' in file or 'langmem' in file:
+            print(full_path)
 
 def check_specific_files():
     """Check for specific files we're concerned about."""
     print("\n=== Checking for specific files ===")
-    inbox_files = []
-    for root, _, files in os.walk('.'):
-        if 'modified_human_inbox.py' in files:
-            inbox_files.append(os.path.join(root, 'modified_human_inbox.py'))
-        if 'modified-human-inbox.py' in files:
-            inbox_files.append(os.path.join(root, 'modified-human-inbox.py'))
+    inbox_files = [
+        full_path for full_path in py_files()
+        if os.path.basename(full_path) in INBOX_FILES
+    ]
     
     if inbox_files:
         print("Found these inbox files:")
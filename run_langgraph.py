@@ -1,27 +1,44 @@
 import os
+import sys
 from dotenv import load_dotenv
-import subprocess
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Set required environment variables
-required_vars = {
-    'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
-    'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY'),
-    'LANGSMITH_API_KEY': os.getenv('LANGSMITH_API_KEY')
-}
-
-# Verify all required variables are set
-missing_vars = [var for var, value in required_vars.items() if not value]
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-
-# Print confirmation of loaded variables
-print("Environment variables loaded successfully:")
-for var in required_vars:
-    print(f"{var}: {'✓' if required_vars[var] else '✗'}")
-
-# Run langgraph-cli serve
-print("\nStarting langgraph-cli serve...")
-subprocess.run(["langgraph-cli", "serve"]) 
\ No newline at end of file
+
+
+def main():
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Set required environment variables
+    required_vars = {
+        'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
+        'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY'),
+        'LANGSMITH_API_KEY': os.getenv('LANGSMITH_API_KEY')
+    }
+
+    # Verify all required variables are set
+    missing_vars = [var for var, value in required_vars.items() if not value]
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    # Print confirmation of loaded variables
+    print("Environment variables loaded successfully:")
+    for var in required_vars:
+        print(f"{var}: {'✓' if required_vars[var] else '✗'}")
+
+    try:
+        from langgraph_cli.cli import cli
+    except ImportError:
+        raise SystemExit(
+            "The langgraph CLI is not installed; install it with "
+            "`pip install -U \"langgraph-cli[inmem]\"` and try again."
+        )
+
+    # Run the langgraph CLI in this interpreter rather than a subprocess, so the
+    # already-loaded environment is reused. Defaults to the local dev server;
+    # any arguments given to this script are passed through instead.
+    args = sys.argv[1:] or ["dev"]
+    print(f"\nStarting langgraph {' '.join(args)}...")
+    cli.main(args=args, prog_name="langgraph", standalone_mode=False)
+
+
+if __name__ == "__main__":
+    main()
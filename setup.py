@@ -19,7 +19,8 @@ setup(
         "anthropic>=0.5.0",
         "langsmith>=0.3.8",
         "langgraph-cli>=0.0.20",
-        "langmem>=0.0.11"
+        "langmem>=0.0.11",
+        "orjson>=3.10"
     ],
     python_requires=">=3.9",
 ) 
\ No newline at end of file
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from eaia.faiss_store import FAISSBackedStore  # noqa: E402
+
+WORDS = ["meeting", "invoice", "travel", "lunch", "contract", "flight", "hotel", "budget"]
+
+
+def embed(texts):
+    """One axis per known word, so a query scores highest against its own word."""
+    return [[1.0 if word in text else 0.0 for word in WORDS] for text in texts]
+
+
+def make_store(**kwargs):
+    return FAISSBackedStore(index={"dims": len(WORDS), "embed": embed}, **kwargs)
+
+
+async def test_put_get_delete():
+    store = make_store()
+    await store.aput(("a",), "k1", {"text": "meeting"})
+    item = await store.aget(("a",), "k1")
+    assert item.value == {"text": "meeting"}
+    await store.adelete(("a",), "k1")
+    assert await store.aget(("a",), "k1") is None
+    assert await store.asearch(("a",), query="meeting") == []
+
+
+async def test_search_ranks_by_similarity():
+    store = make_store()
+    for i, word in enumerate(WORDS[:4]):
+        await store.aput(("a",), f"k{i}", {"text": word})
+    results = await store.asearch(("a",), query="travel", limit=2)
+    assert [r.key for r in results][0] == "k2"
+    assert len(results) == 2
+
+
+async def test_overwritten_key_is_found_by_new_value():
+    store = make_store()
+    await store.aput(("a",), "k", {"text": "meeting"})
+    await store.aput(("a",), "k", {"text": "invoice"})
+    results = await store.asearch(("a",), query="invoice", limit=1)
+    assert [(r.key, r.value["text"]) for r in results] == [("k", "invoice")]
+
+
+async def test_quantizes_large_namespaces():
+    store = make_store(quantize_after=len(WORDS))
+    for i, word in enumerate(WORDS):
+        await store.aput(("a",), f"k{i}", {"text": word})
+    assert store._indexes[("a",)].quantized
+    results = await store.asearch(("a",), query="hotel", limit=1)
+    assert [r.key for r in results] == ["k6"]
+
+
+async def test_checkpoint_reload(tmp_path):
+    path = str(tmp_path / "memory.faiss")
+    store = make_store(path=path, quantize_after=len(WORDS))
+    for i, word in enumerate(WORDS):
+        await store.aput(("a", "b"), f"k{i}", {"text": word})
+    await store.adelete(("a", "b"), "k0")
+    store.checkpoint()
+    # The manifest is plain JSON
+    with open(path) as f:
+        json.load(f)
+
+    reloaded = make_store(path=path, quantize_after=len(WORDS))
+    item = await reloaded.aget(("a", "b"), "k1")
+    assert item.value == {"text": "invoice"}
+    assert item.created_at == (await store.aget(("a", "b"), "k1")).created_at
+    assert await reloaded.aget(("a", "b"), "k0") is None
+    results = await reloaded.asearch(("a",), query="flight", limit=1)
+    assert [r.key for r in results] == ["k5"]
+
+
+async def test_checkpoints_every_n_writes(tmp_path):
+    path = str(tmp_path / "memory.faiss")
+    store = make_store(path=path, checkpoint_every=2)
+    await store.aput(("a",), "k1", {"text": "meeting"})
+    await store.aput(("a",), "k2", {"text": "lunch"})
+    reloaded = make_store(path=path)
+    assert [r.key for r in await reloaded.asearch(("a",), query="lunch", limit=1)] == ["k2"]
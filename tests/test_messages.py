@@ -0,0 +1,34 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from eaia._messages import convert_to_langchain_messages, mentions, normalize_tool_name
+
+
+def test_normalize_tool_name_strips_namespace():
+    assert normalize_tool_name("functions::Question") == "Question"
+    assert normalize_tool_name("functions.x:ResponseEmailDraft ") == "ResponseEmailDraft"
+    assert normalize_tool_name("Ignore") == "Ignore"
+
+
+def test_convert_to_langchain_messages():
+    existing = AIMessage(content="done")
+    converted = convert_to_langchain_messages([
+        {"role": "user", "content": "hi"},
+        {"type": "tool", "content": "ok", "tool_call_id": "1"},
+        {"role": "unknown", "content": "dropped"},
+        existing,
+    ])
+    assert isinstance(converted[0], HumanMessage)
+    assert isinstance(converted[1], ToolMessage) and converted[1].tool_call_id == "1"
+    assert converted[2] is existing
+    assert len(converted) == 3
+
+
+def test_mentions_checks_content_and_tool_call_args():
+    draft = AIMessage(
+        content="",
+        tool_calls=[{"name": "ResponseEmailDraft", "args": {"content": "Happy to set up a Meeting", "new_recipients": []}, "id": "1"}],
+    )
+    assert mentions(draft, "meeting")
+    assert mentions({"content": "No meeting needed"}, "meeting")
+    invite = {"content": "", "tool_calls": [{"name": "SendCalendarInvite", "args": {"emails": ["a@example.com"], "title": "Sync"}}]}
+    assert not mentions(invite, "meeting")
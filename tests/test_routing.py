@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from eaia.main.routing import enter_after_human, route_after_triage, take_action
+from eaia.schemas import RespondTo
+
+
+def _tool_call_message(name):
+    # What the human inbox handlers append after an edit, accept or ignore
+    return {"role": "assistant", "content": "", "tool_calls": [{"name": name, "args": {}, "id": "1"}]}
+
+
+@pytest.mark.parametrize(
+    "tool_name, route",
+    [
+        ("ResponseEmailDraft", "send_email_node"),
+        ("SendCalendarInvite", "send_cal_invite_node"),
+        ("Ignore", "mark_as_read_node"),
+        ("Question", "draft_response"),
+        ("Unknown", "draft_response"),
+    ],
+)
+def test_enter_after_human_routes_dict_tool_calls(tool_name, route):
+    assert enter_after_human({"messages": [_tool_call_message(tool_name)]}) == route
+
+
+def test_enter_after_human_sends_message_objects_back_to_drafting():
+    message = AIMessage(content="", tool_calls=[{"name": "Ignore", "args": {}, "id": "1"}])
+    assert enter_after_human({"messages": [message]}) == "draft_response"
+
+
+def test_enter_after_human_without_messages():
+    notify = RespondTo(logic="", response="notify")
+    assert enter_after_human({"messages": [], "triage": notify}) == "mark_as_read_node"
+    assert enter_after_human({"messages": []}) == "draft_response"
+
+
+@pytest.mark.parametrize(
+    "response, route",
+    [("email", "draft_response"), ("no", "mark_as_read_node"), ("notify", "notify")],
+)
+def test_route_after_triage(response, route):
+    assert route_after_triage({"triage": RespondTo(logic="", response=response)}) == route
+
+
+def test_take_action():
+    config = {"configurable": {}}
+    assert take_action({"messages": [_tool_call_message("Question")]}, config) == "send_message"
+    assert take_action({"messages": [_tool_call_message("Nope")]}, config) == "bad_tool_name"
+    assert take_action({"messages": []}, config) == "bad_tool_name"
+    rewrite = {"configurable": {"draft_and_rewrite": True}}
+    assert take_action({"messages": [_tool_call_message("ResponseEmailDraft")]}, rewrite) == "send_email_draft"
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import random
+import sqlite3
+import time
+
+from eaia.semantic_cache import SemanticCache
+
+
+class FakeEmbeddings:
+    """Unit-ish vectors near a shared direction, so distinct texts still score highly."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            rng = random.Random(text)
+            vectors.append([1.0 + 0.1 * rng.gauss(0, 1) for _ in range(16)])
+        return vectors
+
+
+async def test_same_text_hits():
+    cache = SemanticCache(FakeEmbeddings())
+    await cache.aput(("a",), "can we meet tuesday?", {"summary": "meeting"})
+    assert await cache.aget(("a",), "can we meet tuesday?") == {"summary": "meeting"}
+
+
+async def test_other_namespace_misses():
+    cache = SemanticCache(FakeEmbeddings())
+    await cache.aput(("a", "thread-1"), "can we meet tuesday?", {"summary": "meeting"})
+    assert await cache.aget(("a", "thread-2"), "can we meet tuesday?") is None
+
+
+async def test_expired_entry_misses(monkeypatch):
+    cache = SemanticCache(FakeEmbeddings(), ttl=60)
+    await cache.aput(("a",), "can we meet tuesday?", {"summary": "meeting"})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert await cache.aget(("a",), "can we meet tuesday?") is None
+
+
+async def test_same_thread_hits():
+    cache = SemanticCache(FakeEmbeddings())
+    thread = ["hello", "can we meet tuesday?", "sure, 3pm works"]
+    await cache.aput(("a",), thread, {"summary": "meeting"})
+    assert await cache.aget(("a",), thread) == {"summary": "meeting"}
+
+
+async def test_reply_embeds_only_the_new_message():
+    embeddings = FakeEmbeddings()
+    cache = SemanticCache(embeddings)
+    thread = ["hello", "can we meet tuesday?"]
+    await cache.embed(thread)
+    await cache.embed(thread + ["sure, 3pm works"])
+    assert embeddings.calls == [thread, ["sure, 3pm works"]]
+
+
+async def test_persists_entries_to_path(tmp_path):
+    path = str(tmp_path / "cache.db")
+    thread = ["hello", "can we meet tuesday?"]
+    await SemanticCache(FakeEmbeddings(), path=path).aput(("a",), thread, {"summary": "meeting"})
+    assert await SemanticCache(FakeEmbeddings(), path=path).aget(("a",), thread) == {"summary": "meeting"}
+
+
+async def test_persisted_entries_expire(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    thread = ["hello", "can we meet tuesday?"]
+    await SemanticCache(FakeEmbeddings(), ttl=60, path=path).aput(("a",), thread, {"summary": "meeting"})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert await SemanticCache(FakeEmbeddings(), ttl=60, path=path).aget(("a",), thread) is None
+
+
+async def test_thread_with_extra_reply_misses():
+    cache = SemanticCache(FakeEmbeddings())
+    thread = ["hello", "can we meet tuesday?", "sure, 3pm works", "see you then"]
+    reply = thread + ["actually, can we move it to 4pm?"]
+    await cache.aput(("a",), thread, {"summary": "meeting"})
+    # The pooled vectors are close enough that similarity alone would hit
+    a, b = await cache.embed(thread), await cache.embed(reply)
+    assert sum(x * y for x, y in zip(a, b)) >= cache.threshold
+    assert await cache.aget(("a",), reply) is None
+
+
+def test_reuses_embeddings_across_event_loops():
+    embeddings = FakeEmbeddings()
+    cache = SemanticCache(embeddings)
+    thread = ["hello", "can we meet tuesday?"]
+    asyncio.run(cache.aput(("a",), thread, {"summary": "meeting"}))
+    assert asyncio.run(cache.aget(("a",), thread)) == {"summary": "meeting"}
+    assert embeddings.calls == [thread]
+
+
+class Summary:
+    def __init__(self, text):
+        self.text = text
+
+
+async def test_persists_payloads_through_the_serializer(tmp_path):
+    path = str(tmp_path / "cache.db")
+    thread = ["hello", "can we meet tuesday?"]
+    serializer = {
+        "dumps": lambda summary: json.dumps({"text": summary.text}),
+        "loads": lambda raw: Summary(json.loads(raw)["text"]),
+    }
+    await SemanticCache(FakeEmbeddings(), path=path, **serializer).aput(("a",), thread, Summary("meeting"))
+    (payload,) = sqlite3.connect(path).execute("SELECT payload FROM semantic_cache").fetchone()
+    assert payload == '{"text": "meeting"}'
+    cached = await SemanticCache(FakeEmbeddings(), path=path, **serializer).aget(("a",), thread)
+    assert cached.text == "meeting"
@@ -0,0 +1,42 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langgraph.store.sqlite")
+if not hasattr(sqlite3.Connection, "enable_load_extension"):
+    pytest.skip("sqlite3 was built without extension loading", allow_module_level=True)
+
+from eaia.sqlite_store import ThreadedSqliteStore  # noqa: E402
+
+WORDS = ["meeting", "invoice", "travel", "lunch"]
+
+
+def embed(texts):
+    return [[1.0 if word in text else 0.0 for word in WORDS] for text in texts]
+
+
+def open_store(path):
+    return ThreadedSqliteStore.open(str(path), {"dims": len(WORDS), "embed": embed})
+
+
+async def test_put_search_delete(tmp_path):
+    store = open_store(tmp_path / "memory.db")
+    await store.aput(("a",), "k1", {"text": "meeting"})
+    await store.aput(("a",), "k2", {"text": "invoice"})
+    results = await store.asearch(("a",), query="invoice", limit=1)
+    assert [r.key for r in results] == ["k2"]
+    await store.adelete(("a",), "k2")
+    assert await store.aget(("a",), "k2") is None
+
+
+async def test_reopened_store_keeps_memories(tmp_path):
+    await open_store(tmp_path / "memory.db").aput(("a",), "k1", {"text": "travel"})
+    results = await open_store(tmp_path / "memory.db").asearch(("a",), query="travel", limit=1)
+    assert [r.key for r in results] == ["k1"]
+
+
+def test_shared_across_event_loops(tmp_path):
+    store = open_store(tmp_path / "memory.db")
+    asyncio.run(store.aput(("a",), "k1", {"text": "lunch"}))
+    assert asyncio.run(store.aget(("a",), "k1")).value == {"text": "lunch"}
@@ -0,0 +1,52 @@
+from langgraph.store.memory import InMemoryStore
+
+from eaia.main.triage_cache import forget_triage, lookup_triage, record_triage
+from eaia.schemas import RespondTo
+
+WORDS = ["newsletter", "invoice", "meeting", "weekly", "digest"]
+
+
+def embed(texts):
+    return [[float(text.count(word)) for word in WORDS] for text in texts]
+
+
+def make_store():
+    return InMemoryStore(index={"dims": len(WORDS), "embed": embed})
+
+
+def email(id, sender="news@example.com"):
+    return {"id": id, "from_email": sender}
+
+
+QUERY = "weekly newsletter digest"
+IGNORE = RespondTo(logic="it's a newsletter", response="no")
+
+
+async def test_near_duplicate_from_same_sender_reuses_decision():
+    store = make_store()
+    await record_triage(store, "a", email("e1"), QUERY, IGNORE)
+    cached = await lookup_triage(store, "a", email("e2"), QUERY)
+    assert (cached.logic, cached.response) == (IGNORE.logic, IGNORE.response)
+
+
+async def test_other_sender_or_email_misses():
+    store = make_store()
+    await record_triage(store, "a", email("e1"), QUERY, IGNORE)
+    assert await lookup_triage(store, "a", email("e2", "boss@example.com"), QUERY) is None
+    assert await lookup_triage(store, "a", email("e2"), "invoice meeting") is None
+
+
+async def test_correcting_a_hit_drops_the_source_decision():
+    store = make_store()
+    await record_triage(store, "a", email("e1"), QUERY, IGNORE)
+    assert await lookup_triage(store, "a", email("e2"), QUERY) is not None
+    # The user corrects e2, whose decision was copied from e1
+    await forget_triage(store, "a", email("e2"))
+    assert await lookup_triage(store, "a", email("e3"), QUERY) is None
+
+
+async def test_correcting_the_source_drops_its_decision():
+    store = make_store()
+    await record_triage(store, "a", email("e1"), QUERY, IGNORE)
+    await forget_triage(store, "a", email("e1"))
+    assert await lookup_triage(store, "a", email("e2"), QUERY) is None